@@ -0,0 +1,172 @@
+"""강의실 이용률 분석 (NumPy)
+
+강의 요일 시간표와 날짜별 예약을 (강의실, 요일, 5분 슬롯) 점유율 텐서로 만들어
+저이용 강의실과 혼잡 시간대를 뽑는다.
+
+    python analytics.py --mirror mirror.json --first 2026-10-19 --last 2026-11-15 --csv usage.csv
+"""
+import sys
+import csv
+import json
+import argparse
+import contextlib
+from datetime import date, timedelta
+import numpy as np
+from occupancy import SLOT_MINUTES, SLOTS_PER_DAY, day_pieces
+from room_index import canonical_building, room_keys
+
+WEEKDAY_NAMES = "월화수목금토일"
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+
+
+# 점유율 텐서
+class OccupancyHeatmap:
+    """rooms[i] = (건물, 호수), percent[i, 요일, 슬롯] = 기간 중 그 요일·슬롯이 사용된 날의 비율(%)
+
+    강의실-날짜 행마다 차분 배열(+1/-1)을 찍고 누적합으로 점유를 복원한 뒤 요일별로 더한다.
+    파이썬 반복은 항목 수만큼만 돌고, 슬롯 단위 계산은 모두 배열 연산이다.
+    """
+    def __init__(self, first_day, last_day, weekly_lectures=None, reservations=()):
+        days = (last_day - first_day).days + 1
+        if days <= 0:
+            raise ValueError("기간의 끝이 시작보다 빠릅니다.")
+        self.first_day = first_day
+        self.last_day = last_day
+
+        lectures = list(weekly_lectures.items()) if weekly_lectures is not None else []
+        dated = [
+            (key, (day - first_day).days, first, last)
+            for entries in reservations for entry in entries
+            for key in room_keys(entry)
+            for day, first, last in day_pieces(entry['start'], entry['end'])
+            if first_day <= day <= last_day
+        ]
+        self.rooms = sorted({item[0] for item in lectures} | {item[0] for item in dated})
+        self.buildings = sorted({building for building, _ in self.rooms})
+        room_index = {key: i for i, key in enumerate(self.rooms)}
+        building_index = {building: i for i, building in enumerate(self.buildings)}
+        self.building_of = np.array([building_index[b] for b, _ in self.rooms], dtype=np.intp)
+
+        weekday = (first_day.weekday() + np.arange(days)) % 7
+        rows, starts, ends = [], [], []
+        if lectures:
+            # 강의는 같은 요일의 모든 날짜로 펼침
+            lec_room = np.array([room_index[item[0]] for item in lectures])
+            lec_weekday = np.array([item[1] for item in lectures])
+            lec_start = np.array([item[2] for item in lectures]) // SLOT_MINUTES
+            lec_end = np.minimum(-(-np.array([item[3] for item in lectures]) // SLOT_MINUTES), SLOTS_PER_DAY)
+            li, di = np.nonzero(lec_weekday[:, None] == weekday[None, :])
+            rows.append(lec_room[li] * days + di)
+            starts.append(lec_start[li])
+            ends.append(lec_end[li])
+        if dated:
+            arr = np.array([(room_index[key], day, first, last) for key, day, first, last in dated])
+            rows.append(arr[:, 0] * days + arr[:, 1])
+            starts.append(arr[:, 2])
+            ends.append(arr[:, 3])
+
+        diff = np.zeros((len(self.rooms) * days, SLOTS_PER_DAY + 1), dtype=np.int16)
+        if rows:
+            rows = np.concatenate(rows)
+            np.add.at(diff, (rows, np.concatenate(starts)), 1)
+            np.add.at(diff, (rows, np.concatenate(ends)), -1)
+        busy = (np.cumsum(diff[:, :-1], axis=1) > 0).reshape(len(self.rooms), days, SLOTS_PER_DAY)
+
+        self.day_counts = np.bincount(weekday, minlength=7)
+        counts = np.zeros((len(self.rooms), 7, SLOTS_PER_DAY), dtype=np.int32)
+        for w in range(7):
+            if self.day_counts[w]:
+                counts[:, w] = busy[:, weekday == w].sum(axis=1)
+        self.percent = counts * (100.0 / np.maximum(self.day_counts, 1))[None, :, None]
+
+    def _window(self, weekdays, hours):
+        weekdays = list(weekdays)
+        first, last = hours[0] * SLOTS_PER_HOUR, hours[1] * SLOTS_PER_HOUR
+        return self.percent[:, weekdays, first:last]
+
+    def room_utilisation(self, weekdays=range(5), hours=(9, 18)):
+        """강의실별 평균 이용률(%) 배열 (rooms 순서)"""
+        if not self.rooms:
+            return np.zeros(0)
+        return self._window(weekdays, hours).mean(axis=(1, 2))
+
+    def building_utilisation(self, weekdays=range(5), hours=(9, 18)):
+        """건물별 강의실 평균 이용률(%)"""
+        per_room = self.room_utilisation(weekdays, hours)
+        totals = np.bincount(self.building_of, weights=per_room, minlength=len(self.buildings))
+        sizes = np.bincount(self.building_of, minlength=len(self.buildings))
+        return {b: float(totals[i] / sizes[i]) for i, b in enumerate(self.buildings) if sizes[i]}
+
+    def underused(self, threshold=20.0, weekdays=range(5), hours=(9, 18)):
+        """이용률이 threshold% 미만인 강의실 [(건물, 호수, 이용률)] (낮은 순)"""
+        per_room = self.room_utilisation(weekdays, hours)
+        order = np.argsort(per_room, kind='stable')
+        return [(*self.rooms[i], float(per_room[i])) for i in order if per_room[i] < threshold]
+
+    def peak_hours(self, building=None, weekdays=range(5), top=5):
+        """평균 이용률이 가장 높은 (요일, 시, 이용률) top개. building을 주면 그 건물만"""
+        if not self.rooms:
+            return []
+        percent = self.percent
+        if building is not None:
+            b = self.buildings.index(canonical_building(building))
+            percent = percent[self.building_of == b]
+        weekdays = list(weekdays)
+        hourly = percent[:, weekdays].reshape(len(percent), len(weekdays), 24, SLOTS_PER_HOUR).mean(axis=(0, 3))
+        best = np.argsort(hourly, axis=None, kind='stable')[::-1][:top]
+        return [(WEEKDAY_NAMES[weekdays[i // 24]], int(i % 24), float(hourly.flat[i])) for i in best]
+
+    def write_csv(self, path, weekdays=range(5), hours=(9, 18)):
+        """강의실별 전체/요일별 이용률과 가장 붐비는 시각을 CSV로 저장"""
+        weekdays = list(weekdays)
+        window = self._window(weekdays, hours)
+        hourly = self.percent.reshape(len(self.rooms), 7, 24, SLOTS_PER_HOUR).mean(axis=3)
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['건물', '호수', '이용률(%)'] + [f"{WEEKDAY_NAMES[w]}(%)" for w in weekdays] + ['최다 사용'])
+            for i, (building, room) in enumerate(self.rooms):
+                peak = np.unravel_index(np.argmax(hourly[i][weekdays]), (len(weekdays), 24))
+                writer.writerow(
+                    [building, room, round(float(window[i].mean()), 1)]
+                    + [round(float(v), 1) for v in window[i].mean(axis=1)]
+                    + [f"{WEEKDAY_NAMES[weekdays[peak[0]]]} {peak[1]:02d}시"]
+                )
+
+
+def main(argv=None):
+    from room_query import add_source_arguments, loader_from_args, campus_engine, to_json
+    parser = argparse.ArgumentParser(description="강의실 이용률 분석 (JSON 요약, --csv로 강의실별 표)")
+    add_source_arguments(parser)
+    parser.add_argument('--first', type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (기본: 오늘)")
+    parser.add_argument('--last', type=date.fromisoformat, help="YYYY-MM-DD (기본: 시작일 +6일)")
+    parser.add_argument('--csv', help="강의실별 이용률 CSV 경로")
+    parser.add_argument('--threshold', type=float, default=20.0, help="저이용 기준(%%)")
+    parser.add_argument('--top', type=int, default=5, help="혼잡 시간대 개수")
+    args = parser.parse_args(argv)
+
+    try:
+        loader = loader_from_args(args)
+        with contextlib.redirect_stdout(sys.stderr):
+            engine = campus_engine(loader)
+            heatmap = engine.build_heatmap(args.first, args.last or args.first + timedelta(days=6))
+        if args.csv:
+            heatmap.write_csv(args.csv)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        return 2
+    output = {
+        'first_day': heatmap.first_day.isoformat(), 'last_day': heatmap.last_day.isoformat(),
+        'rooms': len(heatmap.rooms),
+        'buildings': {b: round(v, 1) for b, v in heatmap.building_utilisation().items()},
+        'underused': [{'building': b, 'room': r, 'percent': round(v, 1)}
+                      for b, r, v in heatmap.underused(args.threshold)],
+        'peak_hours': [{'weekday': w, 'hour': h, 'percent': round(v, 1)} for w, h, v in heatmap.peak_hours(top=args.top)],
+        'unchecked_buildings': sorted(engine.get_building_name(code) for code in loader.failed),
+        'lectures_checked': engine.lectures_loaded,
+    }
+    print(json.dumps(to_json(output), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""캠퍼스 전체 충돌 감사 (건물별 프로세스 병렬)
+
+충돌은 (건물, 호수) 안에서만 생기므로 건물 단위로 나눠 프로세스 풀에 보낸다.
+작업자에게는 항목 dict 대신 (호수 번호, 시작 초, 끝 초) 정수 배열만 넘기고,
+돌려받은 인덱스로 원래 항목을 찾아 보고서를 합친다.
+
+    python audit.py --mirror mirror.json            # 건물별 요약 (JSON)
+    python audit.py --offline --xml ../data.xml --groups
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+from array import array
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from room_index import room_keys, unique_lectures
+
+EPOCH = datetime(2000, 1, 1)
+
+
+def encode_shards(*sources):
+    """건물별 (호수 목록, 항목 목록, 호수 번호 배열, 시작 배열, 끝 배열)
+
+    중복 등록된 강의(같은 강의실·시간·강의명)는 자기 자신과의 충돌이 되지 않도록 하나만 넣는다.
+    """
+    shards = {}
+    for entries in sources:
+        for entry in unique_lectures(entries):
+            start = int((entry['start'] - EPOCH).total_seconds())
+            end = int((entry['end'] - EPOCH).total_seconds())
+            for building, room in room_keys(entry):
+                shard = shards.get(building)
+                if shard is None:
+                    shard = shards[building] = ({}, [], array('l'), array('q'), array('q'))
+                rooms, items, room_ids, starts, ends = shard
+                room_ids.append(rooms.setdefault(room, len(rooms)))
+                items.append(entry)
+                starts.append(start)
+                ends.append(end)
+    return shards
+
+def shard_conflicts(room_ids, starts, ends):
+    """한 건물의 충돌 묶음을 (오프셋, 인덱스) 배열로 반환
+
+    (호수, 시작) 순으로 정렬해 한 번 훑으며, 구간이 이어서 겹치는 2개 이상 묶음을 모은다.
+    묶음 k는 indexes[offsets[k]:offsets[k + 1]].
+    """
+    order = sorted(range(len(starts)), key=lambda i: (room_ids[i], starts[i]))
+    offsets, indexes = array('l', [0]), array('l')
+    group, group_room, group_end = [], None, None
+    for i in order:
+        if group and room_ids[i] == group_room and starts[i] < group_end:
+            group.append(i)
+            group_end = max(group_end, ends[i])
+            continue
+        if len(group) > 1:
+            indexes.extend(group)
+            offsets.append(len(indexes))
+        group, group_room, group_end = [i], room_ids[i], ends[i]
+    if len(group) > 1:
+        indexes.extend(group)
+        offsets.append(len(indexes))
+    return offsets, indexes
+
+def audit_conflicts(*sources, workers=None, min_parallel=5000):
+    """전체 충돌 묶음 [((건물, 호수), [항목...])] (건물, 호수, 시작 시각 순)
+
+    항목 수가 min_parallel 미만이거나 workers=1이면 프로세스를 띄우지 않고 바로 계산한다.
+    """
+    shards = encode_shards(*sources)
+    buildings = sorted(shards)
+    payloads = [shards[b][2:] for b in buildings]
+    workers = workers or os.cpu_count() or 1
+    total = sum(len(p[0]) for p in payloads)
+    if workers <= 1 or len(payloads) <= 1 or total < min_parallel:
+        results = [shard_conflicts(*p) for p in payloads]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as pool:
+            results = list(pool.map(shard_conflicts, *zip(*payloads)))
+
+    groups = []
+    for building, (offsets, indexes) in zip(buildings, results):
+        rooms, items, room_ids = shards[building][:3]
+        names = {i: room for room, i in rooms.items()}
+        for k in range(len(offsets) - 1):
+            members = indexes[offsets[k]:offsets[k + 1]]
+            groups.append(((building, names[room_ids[members[0]]]), [items[i] for i in members]))
+    groups.sort(key=lambda g: (g[0], g[1][0]['start']))
+    return groups
+
+def summarize(groups):
+    """건물별 {'groups': 묶음 수, 'entries': 충돌 항목 수, 'rooms': 강의실 수}"""
+    report = {}
+    for (building, room), entries in groups:
+        item = report.setdefault(building, {'groups': 0, 'entries': 0, 'rooms': set()})
+        item['groups'] += 1
+        item['entries'] += len(entries)
+        item['rooms'].add(room)
+    return {b: dict(v, rooms=len(v['rooms'])) for b, v in report.items()}
+
+
+def main(argv=None):
+    # room_query → engine → audit 순으로 가져오므로 여기서 늦게 가져옴
+    from room_query import add_source_arguments, loader_from_args, campus_engine, to_json
+    parser = argparse.ArgumentParser(description="캠퍼스 전체 충돌 감사 (JSON 출력)")
+    add_source_arguments(parser)
+    parser.add_argument('--workers', type=int, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--groups', action='store_true', help="충돌 묶음 전체도 출력")
+    args = parser.parse_args(argv)
+
+    try:
+        loader = loader_from_args(args)
+        with contextlib.redirect_stdout(sys.stderr):
+            engine = campus_engine(loader)
+            groups, summary = engine.audit_campus(args.workers)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        return 2
+    output = {'summary': summary,
+              'unchecked_buildings': sorted(engine.get_building_name(code) for code in loader.failed),
+              'lectures_checked': engine.lectures_loaded}
+    if args.groups:
+        output['groups'] = [
+            {'building': b, 'room': r,
+             'entries': [{k: e.get(k) for k in ('source', 'name', 'person', 'start', 'end')} for e in entries]}
+            for (b, r), entries in groups
+        ]
+    print(json.dumps(to_json(output), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
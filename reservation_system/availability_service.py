@@ -0,0 +1,384 @@
+"""강의실 가용성 HTTP 서비스 (asyncio, 표준 라이브러리만)
+
+한 프로세스가 강의 XML과 전체 건물 예약을 메모리 인덱스로 들고 있고,
+학생/교직원 클라이언트는 HTTP로 조회만 한다.
+
+    python availability_service.py --port 8080 --xml ../data.xml
+    python availability_service.py --fake --xml ../data.xml     # 대역 KUTIS로 로컬 시험
+
+    GET  /availability?building=1공&room=704&start=2026-10-21T18:00&end=2026-10-21T20:00
+    POST /availability            [{"building", "room", "start", "end"}, ...]
+    GET  /free-rooms?building=1공&start=...&end=...     (building 생략 시 전체 건물)
+    GET  /free-slots?building=1공&room=704&start=...&end=...&min=30
+    GET  /conflicts?building=1공
+    GET  /health
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from kutis import KUTIS_URL, KutisClient, parse_building_list, scrape_all_buildings
+from poller import reservation_snapshot
+from engine import ReservationEngine, ReservationStore
+from mirror_store import MirrorStore
+from room_index import canonical_building
+from room_query import parse_query, to_json
+
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 1 << 20
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# 단건 조회 묶음 처리
+class AvailabilityBatcher:
+    """window초 동안 들어온 단건 조회를 모아 check_availability_batch 한 번으로 처리
+
+    동시 요청이 몰릴수록 묶음이 커져 요청당 인덱스 훑기 비용이 줄어든다.
+    조회는 executor(엔진 전용 스레드)에서 돌려 XML 파싱/인덱스 구성이 루프를 막지 않게 한다.
+    """
+    def __init__(self, engine, window=0.002, max_batch=512, executor=None):
+        self.engine = engine
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def check(self, query):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.engine.check_availability_batch, [query for query, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+# 서비스
+class AvailabilityService:
+    """엔진 + 백그라운드 갱신 + HTTP 처리
+
+    엔진 호출(조회, 예약 반영, 미러 읽기)은 모두 엔진 전용 스레드 하나(engine_executor)에서만
+    일어나므로 잠금이 필요 없고, 이벤트 루프는 XML 파싱이나 인덱스 구성 중에도 연결을 받는다.
+    예약 수집은 별도 스레드(scrape_all_buildings)에서 하고 결과만 엔진 스레드에서 반영한다.
+    """
+    def __init__(self, engine, url=KUTIS_URL, mirror=None, interval=60, concurrency=8, timeout=10,
+                 batch_window=0.002):
+        self.engine = engine
+        self.url = url
+        self.mirror = mirror
+        self.interval = interval
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.engine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='engine')
+        self.batcher = AvailabilityBatcher(engine, window=batch_window, executor=self.engine_executor)
+        self.refreshed_at = None
+        self.refresh_errors = {}
+        self._mirror_updated = None
+        self._conflicts = None
+        self._conflict_sources = None
+        self._tasks = []
+
+    async def call_engine(self, func, *args):
+        """엔진 전용 스레드에서 func(*args) 실행"""
+        return await asyncio.get_running_loop().run_in_executor(self.engine_executor, func, *args)
+
+    # ---- 갱신 ----
+    def apply_reservations(self, results):
+        """바뀐 건물만 교체 (그대로면 기존 목록을 유지해 인덱스 재구성을 피함)"""
+        changed = 0
+        for code, entries in results.items():
+            old = self.engine.reservations.peek(code)
+            if old is not None and reservation_snapshot(old) == reservation_snapshot(entries):
+                continue
+            self.engine.reservations.put(code, entries)
+            changed += 1
+        return changed
+
+    def read_mirror(self):
+        """미러가 바뀌었으면 (건물별 예약, 실패) / 그대로면 None (파일 읽기라 엔진 스레드에서)"""
+        data = self.mirror.load() or {}
+        if data.get('updated_at') == self._mirror_updated:
+            return None
+        self._mirror_updated = data.get('updated_at')
+        if not self.engine.buildings:
+            self.engine.buildings = self.mirror.buildings()
+        results = {code: self.mirror.reservations(code) for code, _ in self.engine.buildings}
+        results = {code: entries for code, entries in results.items() if entries is not None}
+        errors = {code: "미러에 없음" for code, _ in self.engine.buildings if code not in results}
+        return results, errors
+
+    async def refresh(self):
+        if self.mirror:
+            loaded = await self.call_engine(self.read_mirror)
+            if loaded is None:
+                return 0
+            results, errors = loaded
+        else:
+            loop = asyncio.get_running_loop()
+            buildings = await self.call_engine(lambda: list(self.engine.buildings))
+            if not buildings:
+                client = KutisClient(self.url, timeout=self.timeout)
+                buildings = parse_building_list(await loop.run_in_executor(None, client.fetch_form_page))
+                await self.call_engine(setattr, self.engine, 'buildings', buildings)
+            results, errors = await scrape_all_buildings(
+                buildings, concurrency=self.concurrency, timeout=self.timeout, url=self.url)
+        changed = await self.call_engine(self.apply_reservations, results)
+        self.refresh_errors = errors
+        self.refreshed_at = time.time()
+        print(f"[LOG][availability_service] 갱신: 건물 {len(results)}개 중 {changed}개 변경, 실패 {len(errors)}개")
+        return changed
+
+    async def refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[LOG][availability_service] 갱신 실패: {e}")
+            await asyncio.sleep(self.interval)
+
+    # ---- 조회 ----
+    def reservations_checked(self, building):
+        code = next((c for c, name in self.engine.buildings if name == building), None)
+        return code is not None and self.engine.reservations.peek(code) is not None
+
+    def mark_checked(self, results):
+        """결과마다 reservations_checked / lectures_checked 표시 (엔진 스레드에서)"""
+        for result in results:
+            result['reservations_checked'] = self.reservations_checked(result['building'])
+            result['lectures_checked'] = self.engine.lectures_loaded
+        return results
+
+    async def availability(self, items):
+        if not all(isinstance(item, dict) for item in items):
+            raise HTTPError(400, "질의는 JSON 객체여야 합니다")
+        queries = [parse_query(item) for item in items]
+        # 잘못된 질의가 같은 묶음의 다른 요청까지 실패시키지 않도록 묶기 전에 확인
+        await self.call_engine(self.engine.validate_rooms, [(b, r) for b, r, _, _ in queries])
+        results = await asyncio.gather(*(self.batcher.check(query) for query in queries))
+        return await self.call_engine(self.mark_checked, results)
+
+    def free_rooms(self, params):
+        building = canonical_building(params['building']) if params.get('building') else None
+        start = datetime.fromisoformat(params['start'])
+        end = datetime.fromisoformat(params['end'])
+        rooms, failed = self.engine.find_free_rooms(building, start, end)
+        return {'start': start, 'end': end, 'rooms': [{'building': b, 'room': r} for b, r in rooms],
+                'unchecked_buildings': [self.engine.get_building_name(code) for code in failed]}
+
+    def free_slots(self, params):
+        building = canonical_building(params['building'])
+        start = datetime.fromisoformat(params['start'])
+        end = datetime.fromisoformat(params['end'])
+        slots = self.engine.room_free_slots(building, params['room'], start, end, int(params.get('min', 0)))
+        return {'building': building, 'room': params['room'], 'free': [{'start': s, 'end': e} for s, e in slots]}
+
+    def conflicts(self, params):
+        """캐시된 전체 데이터의 충돌 묶음 (데이터가 바뀐 경우에만 다시 계산)"""
+        index = self.engine.get_query_index()
+        signature = self.engine.query_sources()[1]
+        if self._conflicts is None or self._conflict_sources != signature:
+            self._conflicts = index.conflict_groups()
+            self._conflict_sources = signature
+        building = canonical_building(params['building']) if params.get('building') else None
+        return [
+            {'building': b, 'room': r,
+             'entries': [{k: e.get(k) for k in ('source', 'name', 'person', 'start', 'end')} for e in group]}
+            for (b, r), group in self._conflicts if building is None or b == building
+        ]
+
+    def health(self):
+        return {'buildings': len(self.engine.buildings), 'lectures': len(self.engine.lecture_data),
+                'refreshed_at': self.refreshed_at, 'refresh_errors': len(self.refresh_errors),
+                'batches': self.batcher.batches, 'batched_queries': self.batcher.queries}
+
+    async def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path.rstrip('/') or '/'
+        try:
+            if path == '/availability' and method == 'GET':
+                return (await self.availability([params]))[0]
+            if path == '/availability' and method == 'POST':
+                items = json.loads(body or b'[]')
+                if not isinstance(items, list):
+                    raise HTTPError(400, "질의 목록(JSON 배열)이 필요합니다")
+                return await self.availability(items)
+            if method != 'GET':
+                raise HTTPError(405, f"허용되지 않는 메서드: {method}")
+            if path == '/free-rooms':
+                return await self.call_engine(self.free_rooms, params)
+            if path == '/free-slots':
+                return await self.call_engine(self.free_slots, params)
+            if path == '/conflicts':
+                return await self.call_engine(self.conflicts, params)
+            if path == '/health':
+                return await self.call_engine(self.health)
+        except (KeyError, ValueError) as e:
+            raise HTTPError(400, f"잘못된 요청: {e}")
+        raise HTTPError(404, f"없는 경로: {path}")
+
+    # ---- HTTP ----
+    async def handle(self, reader, writer):
+        """HTTP/1.1 keep-alive 연결 하나를 처리"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('utf-8', 'replace').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # 본문 경계를 알 수 없으므로 응답 후 연결을 닫음
+                    await self.respond(writer, 400, {'error': "잘못된 Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {'error': "요청 본문이 너무 큽니다"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    status, payload = 200, await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    print(f"[LOG][availability_service] {method} {target}: {e}")
+                    status, payload = 500, {'error': str(e)}
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   413: 'Payload Too Large', 500: 'Internal Server Error'}
+        body = json.dumps(to_json(payload), ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8080, ready=None):
+        """첫 갱신 후 서버 시작. ready(asyncio.Event)가 있으면 수신 준비 시 set"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"[LOG][availability_service] 첫 갱신 실패: {e}")
+        try:
+            await self.call_engine(self.engine.load_xml_data)
+        except Exception as e:
+            print(f"[LOG][availability_service] 강의 XML 읽기 실패: {e}")
+        self.batcher.start()
+        self._tasks.append(asyncio.create_task(self.refresh_loop()))
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+        self.address = server.sockets[0].getsockname()[:2]
+        print(f"[LOG][availability_service] http://{self.address[0]}:{self.address[1]}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.engine_executor.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강의실 가용성 HTTP 서비스")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--url', default=KUTIS_URL, help="KUTIS 주소")
+    parser.add_argument('--mirror', help="미러 저장소 경로 (주면 KUTIS 대신 미러에서 갱신)")
+    parser.add_argument('--xml', help="강의 XML 파일 (없으면 미러 → 네트워크)")
+    parser.add_argument('--interval', type=float, default=60, help="예약 갱신 주기(초)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--batch-window', type=float, default=0.002, help="단건 조회 묶음 대기(초)")
+    parser.add_argument('--fake', action='store_true', help="대역 KUTIS(fake_kutis)를 띄워 사용")
+    args = parser.parse_args(argv)
+
+    url = args.url
+    if args.fake:
+        from fake_kutis import FakeKutis, start_server
+        _, url = start_server(FakeKutis(latency=0.05))
+    mirror = MirrorStore(args.mirror) if args.mirror else None
+
+    def xml_loader():
+        if args.xml:
+            with open(args.xml, 'rb') as f:
+                return f.read()
+        content = mirror.lectures_xml() if mirror else None
+        if content is not None:
+            return content
+        import requests
+        from mirror_daemon import XML_URL
+        response = requests.get(XML_URL, verify=False, timeout=args.timeout)
+        response.raise_for_status()
+        return response.content
+
+    # 예약 수집은 갱신 루프만 하므로 엔진은 캐시에 있는 것만 본다 (fetch_many 없음)
+    # 강의 XML은 serve()가 엔진 스레드에서 읽고 해석한다 (이후 재사용)
+    engine = ReservationEngine(mirror.buildings() if mirror else [], xml_loader=xml_loader,
+                               reservations=ReservationStore())
+    service = AvailabilityService(engine, url=url, mirror=mirror, interval=args.interval,
+                                  concurrency=args.concurrency, timeout=args.timeout,
+                                  batch_window=args.batch_window)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""대역 KUTIS 서버에 대한 스크래핑 처리량 측정
+
+    python bench_scrape.py --buildings 17 --rows 120 --latency 0.2 --concurrency 8
+"""
+import time
+import asyncio
+import argparse
+from kutis import KutisClient, FormStateCache, CircuitBreaker, iter_grid_rows, parse_building_list, scrape_all_buildings
+from fake_kutis import FakeKutis, start_server
+
+
+def timed(label, fn, pages):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {pages / elapsed if elapsed else float('inf'):8.1f} pages/s")
+    return result
+
+def bench_parse(html, repeat):
+    """페이지 1장 파싱: BeautifulSoup 전체 트리 vs dataGrid 구간 파서"""
+    try:
+        from bs4 import BeautifulSoup
+        def full_tree():
+            for _ in range(repeat):
+                soup = BeautifulSoup(html, 'html.parser')
+                [tuple(td.text.strip() for td in row.find_all('td')) for row in soup.select('#dataGrid tr:not(:first-child)')]
+        timed("parse: BeautifulSoup", full_tree, repeat)
+    except ImportError:
+        print("parse: BeautifulSoup            (bs4 없음, 생략)")
+    timed("parse: iter_grid_rows", lambda: [list(iter_grid_rows(html)) for _ in range(repeat)], repeat)
+
+def main():
+    parser = argparse.ArgumentParser(description="대역 KUTIS 스크래핑 벤치마크")
+    parser.add_argument('--fixtures', help="녹화 디렉터리 (없으면 합성 페이지)")
+    parser.add_argument('--buildings', type=int, default=17)
+    parser.add_argument('--rows', type=int, default=120)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--reject-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--parse-repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakeKutis(args.fixtures, buildings=args.buildings, rows=args.rows, latency=args.latency,
+                     error_rate=args.error_rate, reject_rate=args.reject_rate)
+    server, url = start_server(fake)
+    print(f"[LOG][bench_scrape] {url} 건물 {len(fake.buildings)}개, 지연 {args.latency}s")
+    try:
+        # 오류 주입 시에도 모든 행이 실제 요청을 재도록 차단기는 열리지 않게 둠
+        breaker = CircuitBreaker(failure_threshold=10**9)
+        client = KutisClient(url, breaker=breaker)
+        buildings = parse_building_list(client.fetch_form_page())
+        n = len(buildings)
+
+        bench_parse(fake.issue_state(fake.pages[buildings[0][0]]), args.parse_repeat)
+
+        def serial(reuse):
+            total, failed = 0, 0
+            for code, name in buildings:
+                if not reuse:
+                    client.form_state.invalidate()  # 예전 방식: 매번 GET + POST
+                try:
+                    total += len(client.scrape_building(code, name))
+                except Exception:
+                    failed += 1     # 비동기 조회와 같이 실패한 건물만 세고 계속
+            return total, failed
+
+        rows, serial_failed = timed("serial GET+POST", lambda: serial(False), n)
+        timed("serial POST (form reuse)", lambda: serial(True), n)
+        results, errors = timed(
+            f"asyncio x{args.concurrency}",
+            lambda: asyncio.run(scrape_all_buildings(buildings, concurrency=args.concurrency, url=url,
+                                                     form_state=FormStateCache(), breaker=breaker)),
+            n
+        )
+        print(f"예약 {rows}건(실패 {serial_failed}개 건물) / "
+              f"동시 조회 결과 {sum(len(v) for v in results.values())}건, 실패 {len(errors)}개 건물")
+        print(f"서버 통계: {fake.stats}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,589 @@
+"""강의실 충돌/가용성 엔진 (Tk 없이 사용)
+
+강의 XML 해석, 충돌 검사, 빈 강의실/빈 시간 조회를 GUI와 분리해 둔다.
+네트워크는 생성자로 받은 함수(xml_loader, fetch_many)로만 접근하므로
+서버, 배치 작업, 벤치마크에서 바로 만들어 쓸 수 있다.
+
+    engine = ReservationEngine(buildings, xml_loader=lambda: open('data.xml', 'rb').read())
+    engine.load_xml_data()
+    engine.is_conflict({'building': '제1공학관', 'room': '704', 'start': s, 'end': e})
+"""
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from room_index import (BUILDING_ALIASES, RoomIndex, canonical_building, room_numbers, room_keys,
+                        unique_lectures, merge_reservations)
+from interval_tree import RoomIntervalTrees
+from occupancy import OccupancyGrid, SLOT_MINUTES, day_pieces
+from recurrence import WeeklyLectures, weekly_occurrences, recurring_conflicts
+from audit import audit_conflicts, summarize
+
+LECTURE_WINDOWS = 4     # 기준일별로 보관하는 ±6일 강의 목록 수
+
+# 축약 ↔ 공식 건물명
+BUILDING_CODE_MAP = {
+    '1공': '제1공학관', '4공': '제4공학관', '5공': '제5공학관(제2자연관)', '건': '건강과학관(제1자연관)', '교': '교육관',
+    '경': '제1경영관(제1경상관)', '문': '문무관', '2경': '제2경영관(제2경상관)', '창': '창조관', '산': '산학협력관',
+    '디': '디자인관', '법': '법정관', '예': '예술관', '고운': '고운관(인문관)', '성훈': '성훈관(제3공학관)',
+    '국': '국제어학관(국제교육관)', '한': '한마관',
+    '제1공학관': '1공', '제4공학관': '4공', '제5공학관(제2자연관)': '5공', '건강과학관(제1자연관)': '건', '교육관': '교',
+    '제1경영관(제1경상관)': '경', '문무관': '문', '제2경영관(제2경상관)': '2경', '창조관': '창', '산학협력관': '산',
+    '디자인관': '디', '법정관': '법', '예술관': '예', '고운관(인문관)': '고운', '성훈관(제3공학관)': '성훈',
+    '국제어학관(국제교육관)': '국', '한마관': '한'
+}
+
+
+def normalize_building_name(name, building_code_map=BUILDING_CODE_MAP):
+    """건물 이름 표준화"""
+    return building_code_map.get(name, name)
+
+def is_time_overlap(start1, end1, start2, end2):
+    return start1 < end2 and start2 < end1
+
+def parse_time_code(time_code, reference_date=None, days_ahead=6):
+    """'화B', '월1-3' 같은 강의 시간 코드를 기준일 ±days_ahead일의 (시작, 끝) 목록으로"""
+    try:
+        time_code = str(time_code).strip().upper()
+        if len(time_code) < 1:
+            return []
+        day_char = time_code[0]
+        kor_to_eng = {'월':'M','화':'T','수':'W','목':'R','금':'F','토':'S','일':'U'}
+        if day_char not in kor_to_eng:
+            raise ValueError(f"잘못된 요일 코드: {time_code}")
+        day_num = kor_to_eng[day_char]
+        day_map = {'M':0, 'T':1, 'W':2, 'R':3, 'F':4, 'S':5, 'U':6}
+        target_weekday = day_map[day_num]
+        base_date = (reference_date or datetime.today()).replace(second=0, microsecond=0)
+        period_str = time_code[1:]
+        periods = []
+        for part in period_str.split(','):
+            part = part.strip()
+            if '-' in part:
+                start, end = part.split('-', 1)
+                current = start
+                while True:
+                    periods.append(current)
+                    if current == end: break
+                    current = str(int(current)+1) if current.isdigit() else chr(ord(current)+1)
+            else:
+                periods.append(part)
+        time_ranges = []
+        for day_offset in range(-days_ahead, days_ahead +1):
+            current_date = base_date + timedelta(days=day_offset)
+            if current_date.weekday() != target_weekday:
+                continue
+            for period in periods:
+                if period.isdigit():
+                    period_num = int(period)
+                    if not 1 <= period_num <= 14: continue
+                    start_time = current_date.replace(hour=9 + (period_num - 1), minute=0)
+                    end_time = start_time + timedelta(minutes=50)
+                elif period.isalpha() and len(period) == 1:
+                    idx = ord(period.upper()) - ord('A')
+                    start_min = 540 + 90 * idx
+                    hours, mins = divmod(start_min, 60)
+                    start_time = current_date.replace(hour=hours, minute=mins)
+                    end_time = start_time + timedelta(minutes=75)
+                else:
+                    continue
+                time_ranges.append((start_time, end_time))
+        return time_ranges
+    except Exception as e:
+        print(f"[LOG][parse_time_code] {time_code} ({e})")
+        return []
+
+def parse_lectures_xml(content, reference_date=None, building_code_map=BUILDING_CODE_MAP):
+    """강의 XML → (강의 항목 목록, (공식 건물명, 호수) → XML 강의실 이름 집합)
+
+    같은 강의실·시간에 같은 강의가 중복 등록된 항목은 하나로 합친다 (unique_lectures).
+
+    XML 자체가 잘못되면 ET.ParseError를 올리고, 강의 하나의 오류는 건너뛴다.
+    """
+    root = ET.fromstring(content)
+    lecture_data = []
+    room_labels = {}
+    for lecture in root.findall('Lecture'):
+        name = lecture.find('Name').text.strip() if lecture.find('Name') is not None else "이름 없는 강의"
+        try:
+            raw_times = lecture.find('Time').text.strip()
+            raw_rooms = lecture.find('Room').text.strip()
+            expanded_times = []
+            for time_part in raw_times.split(','):
+                time_part = time_part.strip()
+                if '-' in time_part:
+                    day = time_part[0]
+                    start_end = time_part[1:].split('-')
+                    if len(start_end) == 2:
+                        start, end = start_end
+                        for i in range(int(start), int(end)+1):
+                            expanded_times.append(f"{day}{i}")
+                else:
+                    expanded_times.append(time_part)
+            rooms = [r.strip() for r in raw_rooms.split(',') if r.strip()]
+            if not rooms:
+                continue
+            if len(rooms) < len(expanded_times):
+                rooms *= len(expanded_times)
+            for time_code, room_str in zip(expanded_times, rooms):
+                alt_names = re.findall(r'\((.*?)\)', room_str)
+                base_room = re.sub(r'\(.*?\)', '', room_str).strip()
+                parts = base_room.split('-', 1)
+                building_part = parts[0].strip()
+                room_part = parts[1].strip() if len(parts) > 1 else building_part
+                building = normalize_building_name(building_part, building_code_map)
+                all_room_names = [room_part] + [alt.strip() for alt in alt_names if alt.strip()]
+                canonical = canonical_building(building)
+                for number in room_numbers(all_room_names, canonical):
+                    room_labels.setdefault((canonical, number), set()).update(all_room_names)
+                time_ranges = parse_time_code(time_code, reference_date=reference_date)
+                for start, end in time_ranges:
+                    for room_name in all_room_names:
+                        lecture_data.append({
+                            'building': building,
+                            'room': room_name,
+                            'start': start,
+                            'end': end,
+                            'source': '수업',
+                            'name': name
+                        })
+        except Exception as e:
+            print(f"🚫 강의 '{name}' 처리 실패: {str(e)}")
+            continue
+    return unique_lectures(lecture_data), room_labels
+
+
+# 건물별 예약 보관 (네트워크 없이 쓸 때)
+class ReservationStore:
+    """건물 코드 → 예약 목록. kutis.ReservationCache와 같은 peek/put만 제공"""
+    def __init__(self, data=None):
+        self._data = dict(data or {})
+
+    def peek(self, code):
+        return self._data.get(code)
+
+    def put(self, code, entries):
+        self._data[code] = entries
+
+
+# 충돌/가용성 엔진
+class ReservationEngine:
+    """강의/웹/수동 데이터와 그 위의 인덱스를 관리
+
+    buildings: [(코드, 이름)]
+    xml_loader(): 강의 XML 바이트 (없으면 None)
+    reservations: 건물별 예약 캐시 (peek/put, 기본 ReservationStore)
+    fetch_many(missing): [(코드, 이름)] 조회 → (결과 dict, 실패 dict). 없으면 캐시에 있는 것만 사용
+    """
+    def __init__(self, buildings=(), xml_loader=None, reservations=None, fetch_many=None,
+                 building_code_map=BUILDING_CODE_MAP):
+        self.buildings = list(buildings)
+        self.xml_loader = xml_loader
+        self.reservations = reservations if reservations is not None else ReservationStore()
+        self.fetch_many = fetch_many
+        self.building_code_map = building_code_map
+
+        self.website_data = []
+        self.manual_data = []
+        self.lecture_data = []
+        self.room_labels = {}   # (공식 건물명, 호수) → XML 강의실 이름들 ('PC룸' 등)
+        self.lecture_reference = None   # lecture_data를 만든 기준 날짜 (±6일 포함)
+        self.xml_content = None         # 받아 둔 강의 XML 바이트 (reset_lectures 전까지 재사용)
+        self.stored_lectures = None     # 저장소의 요일 시간표 (있으면 XML을 받지 않고 이것으로 펼침)
+        self.stored_room_labels = {}
+        self._xml_version = 0
+        self._parsed_lectures = OrderedDict()   # 기준 날짜 → (강의 목록, 강의실 이름), 최근 것부터
+        self.conflict_index = None
+        self.room_trees = None
+        self.occupancy = None
+        self._index_sources = None
+        self.conflict_groups = []
+        self._query_grid = None
+        self._query_sources = None
+        self._query_index = None
+        self._query_index_sources = None
+        self._reservation_index = None
+        self._reservation_index_sources = None
+        self._weekly_lectures = None
+        self._weekly_sources = None
+
+    def building_codes(self, names=None):
+        """이름(약칭 포함) 목록에 해당하는 건물 코드 (None이면 전체)"""
+        if names is not None:
+            names = {canonical_building(name) for name in names}
+        return [code for code, name in self.buildings if names is None or canonical_building(name) in names]
+
+    def known_buildings(self):
+        """질의할 수 있는 공식 건물명 (KUTIS 건물 목록 + 강의 시간표 + 약칭표)"""
+        return ({canonical_building(name) for _, name in self.buildings} | self.get_weekly_lectures().buildings()
+                | set(BUILDING_ALIASES.values()))
+
+    def validate_rooms(self, rooms):
+        """[(건물, 강의실)] 중 모르는 건물이나 호수가 없는 강의실이 있으면 ValueError"""
+        known = None
+        for building, room in rooms:
+            name = canonical_building(building)
+            if not room_numbers(room, name):
+                raise ValueError(f"강의실 번호가 유효하지 않습니다: {room}")
+            if known is None:
+                known = self.known_buildings()
+            if name not in known:
+                raise ValueError(f"알 수 없는 건물: {building}")
+
+    def get_building_name(self, code):
+        return next((name for c, name in self.buildings if c == code), "알 수 없음")
+
+    # ========= 강의 데이터 ==========
+    def load_xml_data(self, reference_date=None):
+        """강의 XML을 기준일(없으면 오늘) ±6일로 펼침
+
+        XML 바이트는 한 번만 받아 두고, 펼친 결과는 기준일별로 최근 LECTURE_WINDOWS개를
+        보관하므로 같은 주들을 오가도 다시 받거나 파싱하지 않는다.
+        XML을 받을 수 없으면 강의 없이 False를 반환하고, XML이 잘못되면 예외를 올린다.
+        use_stored_lectures로 시간표를 넘겨 두었으면 XML 대신 그것을 펼친다.
+        """
+        reference = (reference_date or datetime.today()).date()
+        parsed = self._parsed_lectures.get(reference)
+        if parsed is not None:
+            self._parsed_lectures.move_to_end(reference)
+        else:
+            if self.xml_content is None and self.stored_lectures is not None:
+                lectures = self.stored_lectures.entries(reference - timedelta(days=6), reference + timedelta(days=6))
+                parsed = (unique_lectures(lectures), self.stored_room_labels)
+            else:
+                if self.xml_content is None:
+                    self.xml_content = self.xml_loader() if self.xml_loader else None
+                    self._xml_version += 1
+                if self.xml_content is None:
+                    self.lecture_data = []
+                    return False
+                try:
+                    parsed = parse_lectures_xml(self.xml_content, datetime.combine(reference, datetime.min.time()),
+                                                self.building_code_map)
+                except Exception:
+                    self.lecture_data = []
+                    self.xml_content = None
+                    raise
+            self._parsed_lectures[reference] = parsed
+            while len(self._parsed_lectures) > LECTURE_WINDOWS:
+                self._parsed_lectures.popitem(last=False)
+        self.lecture_data, self.room_labels = parsed
+        self.lecture_reference = reference
+        return True
+
+    @property
+    def lectures_loaded(self):
+        """강의 XML을 받아 해석했는지 (False면 강의 충돌은 확인되지 않은 결과)"""
+        return self.lecture_reference is not None and (
+            self.xml_content is not None or self.stored_lectures is not None)
+
+    def use_stored_lectures(self, weekly, room_labels=None):
+        """저장해 둔 요일 시간표(WeeklyLectures)와 강의실 별칭으로 강의를 채움 (XML을 받지 못할 때)"""
+        self.stored_lectures = weekly
+        self.stored_room_labels = room_labels or {}
+        self._parsed_lectures.clear()
+        self.lecture_reference = None
+        self._xml_version += 1
+
+    def reset_lectures(self):
+        """받아 둔 XML/저장 시간표와 펼친 결과를 버림 (다음 load_xml_data에서 새로 받음)"""
+        self.xml_content = None
+        self.stored_lectures = None
+        self._parsed_lectures.clear()
+        self.lecture_reference = None
+
+    def ensure_lectures(self, first_day, last_day=None):
+        """[first_day, last_day]가 현재 강의 데이터 범위(기준일 ±6일) 밖일 때만 XML을 다시 펼침
+
+        다시 펼칠 때는 범위 가운데 날짜를 기준으로 삼는다 (최대 13일).
+        """
+        last_day = last_day or first_day
+        if self.lecture_reference is not None and all(
+                abs((day - self.lecture_reference).days) <= 6 for day in (first_day, last_day)):
+            return
+        middle = first_day + (last_day - first_day) / 2
+        self.load_xml_data(reference_date=datetime.combine(middle, datetime.min.time()))
+
+    def get_weekly_lectures(self):
+        """요일별 반복 시간표. ±6일 창이면 모든 요일이 들어 있으므로 XML을 새로 받았을 때만 재구성"""
+        if self.lecture_reference is None:
+            self.load_xml_data()
+        signature = (self._xml_version, bool(self.lecture_data))
+        if self._weekly_lectures is None or self._weekly_sources != signature:
+            self._weekly_lectures = WeeklyLectures(self.lecture_data)
+            self._weekly_sources = signature
+        return self._weekly_lectures
+
+    # ========= 예약 데이터 ==========
+    def ensure_reservations(self, codes):
+        """캐시에 없는 건물만 fetch_many로 채움. 실패한 건물 코드 목록 반환"""
+        missing = [(code, self.get_building_name(code)) for code in codes
+                   if self.reservations.peek(code) is None]
+        if not missing or self.fetch_many is None:
+            return [code for code, _ in missing]
+        results, errors = self.fetch_many(missing)
+        for code, entries in results.items():
+            self.reservations.put(code, entries)
+        return list(errors)
+
+    def set_website_data(self, data):
+        """웹 예약을 새 조회 결과로 교체하고 충돌 인덱스에 변경분만 반영. 변경분 반환"""
+        index_current = self.index_is_current()
+        self.website_data, delta = merge_reservations(self.website_data, data)
+        if index_current:
+            self.apply_conflict_delta(removed=delta['removed'], added=delta['added'])
+        else:
+            self.check_conflicts()
+        return delta
+
+    def add_manual_entry(self, entry):
+        """수동 예약 추가. 겹치는 항목만 충돌 표시 갱신"""
+        entry = dict(entry, source='수동입력', conflict=False)
+        entry.setdefault('person', '')
+        entry.setdefault('status', '수동')
+        index_current = self.index_is_current()
+        self.manual_data.append(entry)
+        if index_current:
+            self.apply_conflict_delta(added=[entry])
+        else:
+            self.check_conflicts()
+        return entry
+
+    def remove_manual_entries(self, removed):
+        """수동 예약 삭제. 겹쳤던 항목만 충돌 표시 재계산"""
+        if not removed:
+            return
+        index_current = self.index_is_current()
+        removed_ids = {id(e) for e in removed}
+        self.manual_data = [e for e in self.manual_data if id(e) not in removed_ids]
+        if index_current:
+            self.apply_conflict_delta(removed=removed)
+        else:
+            self.check_conflicts()
+
+    # ========= 충돌 인덱스 ==========
+    def index_signature(self):
+        return tuple((id(data), len(data)) for data in (self.lecture_data, self.website_data, self.manual_data))
+
+    def index_is_current(self):
+        return self.conflict_index is not None and self._index_sources == self.index_signature()
+
+    def get_conflict_index(self):
+        """강의/웹/수동 데이터가 바뀐 경우에만 (건물, 강의실) 인덱스와 구간 트리 재구성"""
+        if not self.index_is_current():
+            sources = (self.lecture_data, self.website_data, self.manual_data)
+            self.conflict_index = RoomIndex(*sources)
+            self.room_trees = RoomIntervalTrees(*sources)
+            self.occupancy = OccupancyGrid(*sources)
+            self._index_sources = self.index_signature()
+        return self.conflict_index
+
+    def apply_conflict_delta(self, removed=(), added=()):
+        """인덱스/구간 트리에 변경분만 반영. 충돌 표시는 구간 트리가 관련 항목만 갱신"""
+        for entry in removed:
+            self.conflict_index.remove(entry)
+            self.room_trees.remove(entry)
+        self.conflict_index.add_many(added)
+        for entry in added:
+            self.room_trees.add(entry)
+        self.occupancy.add_many(added)
+        # 비트 OR는 되돌릴 수 없으므로 삭제된 항목의 강의실-날짜만 다시 계산
+        for entry in removed:
+            for building, room in room_keys(entry):
+                for day, _, _ in day_pieces(entry['start'], entry['end']):
+                    day_start = datetime.combine(day, datetime.min.time())
+                    remaining = self.room_trees.tree((building, room))
+                    entries = remaining.overlap(day_start, day_start + timedelta(days=1)) if remaining else []
+                    self.occupancy.set_day(building, room, day, entries)
+        self._index_sources = self.index_signature()
+        touched = {key for entry in (*removed, *added) for key in room_keys(entry)}
+        self.conflict_groups = ([g for g in self.conflict_groups if g[0] not in touched]
+                                + self.conflict_index.conflict_groups(touched))
+
+    def check_conflicts(self, only=None):
+        """웹/수동/수업 전체를 강의실별 스윕으로 검사해 겹치는 묶음마다 충돌 표시
+
+        only가 주어지면 해당 (건물, 강의실) 키만 다시 검사한다.
+        """
+        index = self.get_conflict_index()
+        keys = list(index.keys()) if only is None else [key for key in only if key in index.keys()]
+        for key in keys:
+            for _, _, entry in index.intervals(*key):
+                entry['conflict'] = False
+        groups = index.conflict_groups(keys)
+        if only is None:
+            self.conflict_groups = groups
+        else:
+            self.conflict_groups = [g for g in self.conflict_groups if g[0] not in only] + groups
+        conflicts = set()
+        for _, group in groups:
+            for entry in group:
+                entry['conflict'] = True
+                conflicts.add(id(entry))
+        return conflicts
+
+    def is_conflict(self, new_entry):
+        """인덱스에서 같은 강의실의 겹치는 항목 조회 (없으면 False)"""
+        index = self.get_conflict_index()
+        building = canonical_building(new_entry['building'])
+        for room in room_numbers(new_entry['room'], building):
+            # 5분 비트맵이 비어 있으면 구간 조회 생략
+            if self.occupancy.is_free(building, room, new_entry['start'], new_entry['end']):
+                continue
+            entry = index.first_conflict(building, room, new_entry['start'], new_entry['end'])
+            if entry:
+                return {
+                    'source': entry['source'],
+                    'name': entry.get('name', ''),
+                    'start': entry['start'],
+                    'end': entry['end']
+                }
+        return False
+
+    # ========= 조회 ==========
+    def reservation_sources(self):
+        """강의를 뺀 조회용 데이터(수동 입력, 캐시된 모든 건물 예약)와 그 서명
+
+        질의마다 건물 조합이 달라도 같은 인덱스를 쓰도록 캐시에 있는 건물은 모두 넣는다.
+        """
+        sources = (self.manual_data, *(self.reservations.peek(code) or [] for code, _ in self.buildings))
+        return sources, tuple((id(data), len(data)) for data in sources)
+
+    def query_sources(self):
+        """조회용 데이터(현재 강의 창 + reservation_sources)와 그 서명"""
+        sources, signature = self.reservation_sources()
+        return (self.lecture_data, *sources), ((id(self.lecture_data), len(self.lecture_data)), *signature)
+
+    def get_query_grid(self):
+        """강의 + 예약 캐시 + 수동 입력 점유 비트맵. 입력이 그대로면 재사용"""
+        sources, signature = self.query_sources()
+        if self._query_grid is None or self._query_sources != signature:
+            self._query_grid = OccupancyGrid(*sources)
+            self._query_sources = signature
+        return self._query_grid
+
+    def get_query_index(self):
+        """get_query_grid와 같은 데이터로 만든 (건물, 강의실) 정렬 구간 인덱스"""
+        sources, signature = self.query_sources()
+        if self._query_index is None or self._query_index_sources != signature:
+            self._query_index = RoomIndex(*sources)
+            self._query_index_sources = signature
+        return self._query_index
+
+    def get_reservation_index(self):
+        """reservation_sources로 만든 (건물, 강의실) 정렬 구간 인덱스. 입력이 그대로면 재사용"""
+        sources, signature = self.reservation_sources()
+        if self._reservation_index is None or self._reservation_index_sources != signature:
+            self._reservation_index = RoomIndex(*sources)
+            self._reservation_index_sources = signature
+        return self._reservation_index
+
+    def check_availability_batch(self, queries):
+        """(건물, 강의실, 시작, 끝) 질의 여러 개를 한 번에 판정
+
+        강의는 요일 시간표로 날짜와 상관없이 확인하고, 웹/수동 예약은 정렬 인덱스를
+        한 번 훑어(first_conflicts) 찾으므로 학기 전체에 흩어진 질의도 XML을 다시 펼치지 않는다.
+        결과는 질의 순서대로 {'building', 'room', 'start', 'end', 'available', 'conflict'}이다.
+        conflict는 겹치는 항목 중 하나일 뿐 가장 이른 것이라는 보장은 없다: 웹/수동 예약은
+        first_conflicts가 준 항목(시작이 질의 끝보다 이른 항목 중 가장 늦게 끝나는 것), 강의는 가장
+        이른 강의이고, 둘 다 있으면 시작이 이른 쪽을 준다.
+        모르는 건물이나 호수가 없는 강의실이 있으면 ValueError (없는 강의실을 비었다고 답하지 않음).
+        """
+        self.validate_rooms([(building, room) for building, room, _, _ in queries])
+        codes = self.building_codes({canonical_building(building) for building, _, _, _ in queries})
+        self.ensure_reservations(codes)
+        weekly = self.get_weekly_lectures()
+        found = self.get_reservation_index().first_conflicts(queries)
+        results = []
+        for (building, room, start, end), entry in zip(queries, found):
+            candidates = [entry] if entry is not None else []
+            name = canonical_building(building)
+            for number in room_numbers(room, name):
+                candidates.extend(weekly.overlapping(name, number, start, end)[:1])
+            conflict = min(candidates, key=lambda e: e['start']) if candidates else None
+            results.append({
+                'building': building,
+                'room': room,
+                'start': start,
+                'end': end,
+                'available': conflict is None,
+                'conflict': None if conflict is None else {
+                    'source': conflict['source'],
+                    'name': conflict.get('name', ''),
+                    'start': conflict['start'],
+                    'end': conflict['end']
+                }
+            })
+        return results
+
+    def find_free_rooms(self, building, start, end):
+        """[start, end) 내내 빈 (건물, 호수) 목록과 조회 실패 건물. building=None이면 전체 건물
+
+        후보는 강의/예약 기록에 한 번이라도 나온 강의실이다.
+        """
+        self.ensure_lectures(start.date())
+        codes = self.building_codes(None if building is None else [building])
+        failed = self.ensure_reservations(codes)
+        rooms = self.get_query_grid().free_rooms(start, end, building)
+        return rooms, failed
+
+    def room_free_slots(self, building, room, start, end, min_minutes=0):
+        """강의실 하나의 [start, end) 중 빈 구간 목록 (강의/웹/수동 반영)"""
+        rooms = room_numbers(room, canonical_building(building))
+        if not rooms:
+            raise ValueError("강의실 번호가 유효하지 않습니다")
+        self.ensure_lectures(start.date(), (end - timedelta(microseconds=1)).date())
+        codes = self.building_codes([building])
+        self.ensure_reservations(codes)
+        return self.get_query_grid().free_intervals(building, rooms[0], start, end, min_minutes)
+
+    def find_earliest_rooms(self, minutes, start, end, buildings=None, prefer=(), prefixes=(),
+                            limit=10, day_hours=(9, 22)):
+        """minutes분 연속으로 빈 (시작 시각, 건물, 호수) 후보를 이른 순으로 limit개
+
+        buildings가 없으면 전체 건물, prefixes가 있으면 호수나 XML 강의실 이름('PC룸' 등)이
+        그중 하나로 시작하는 강의실만 본다. 강의 데이터가 펼쳐지는 범위에 맞춰
+        검색 기간은 시작일부터 13일까지로 자른다.
+        """
+        end = min(end, datetime.combine(start.date() + timedelta(days=13), datetime.min.time()))
+        self.ensure_lectures(start.date(), (end - timedelta(microseconds=1)).date())
+        names = buildings or [name for _, name in self.buildings]
+        codes = self.building_codes(names)
+        self.ensure_reservations(codes)
+        grid = self.get_query_grid()
+        rooms = [key for name in names for key in grid.rooms(name)]
+        if prefixes:
+            rooms = [key for key in rooms
+                     if any(label.startswith(prefix) for prefix in prefixes
+                            for label in self.room_labels.get(key, set()) | {key[1]})]
+        slots_per_hour = 60 // SLOT_MINUTES
+        return grid.earliest_fit(rooms, minutes, start, end, prefer=prefer, limit=limit,
+                                 day_start=day_hours[0] * slots_per_hour, day_end=day_hours[1] * slots_per_hour)
+
+    def check_recurring(self, building, room, weekdays, start_time, end_time, first_day, last_day, every=1):
+        """매주 반복 예약(예: 15주 동아리 모임)의 충돌 회차와 사유를 한 번에 조회
+
+        강의는 요일 시간표로 학기 전체에 적용하고, 웹/수동 예약은 인덱스로 확인한다.
+        """
+        weekly = self.get_weekly_lectures()
+        codes = self.building_codes([building])
+        self.ensure_reservations(codes)
+        occurrences = weekly_occurrences(weekdays, start_time, end_time, first_day, last_day, every)
+        reservations = [self.reservations.peek(code) or [] for code in codes]
+        return recurring_conflicts(building, room, occurrences, weekly, [self.manual_data, *reservations])
+
+    # ========= 분석 ==========
+    def build_heatmap(self, first_day, last_day):
+        """강의 시간표 + 캐시된 전체 건물 예약 + 수동 입력으로 이용률 히트맵 생성"""
+        from analytics import OccupancyHeatmap  # NumPy는 분석 기능에서만 필요
+        weekly = self.get_weekly_lectures()
+        reservations = [self.reservations.peek(code) or [] for code, _ in self.buildings]
+        return OccupancyHeatmap(first_day, last_day, weekly, [self.manual_data, *reservations])
+
+    def audit_campus(self, workers=None):
+        """강의 + 캐시된 전체 건물 예약 + 수동 입력의 충돌을 건물별 프로세스 병렬로 감사"""
+        if self.lecture_reference is None:
+            self.load_xml_data()
+        reservations = [self.reservations.peek(code) or [] for code, _ in self.buildings]
+        groups = audit_conflicts(self.lecture_data, self.manual_data, *reservations, workers=workers)
+        return groups, summarize(groups)
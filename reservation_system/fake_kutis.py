@@ -0,0 +1,236 @@
+"""KUTIS AE0561M 대역 서버
+
+녹화한 AE0561M 페이지(또는 합성 페이지)를 로컬에서 재생한다.
+- GET  /ADFF/AE/AE0561M.aspx : 건물 드롭다운 + hidden 필드가 있는 첫 페이지
+- POST /ADFF/AE/AE0561M.aspx : 발급한 __VIEWSTATE만 받아들이고 건물별 dataGrid 페이지 반환
+지연(latency), 오류(error_rate), 폼 상태 만료(reject_rate)를 주입할 수 있다.
+
+    python fake_kutis.py serve --port 8561 --latency 0.2
+    python fake_kutis.py record fixtures/   # 실제 KUTIS 페이지 녹화
+"""
+import os
+import re
+import time
+import base64
+import random
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import requests
+from kutis import KUTIS_URL, FORM_FIELDS, extract_form_state, parse_building_list
+
+FORM_PATH = "/ADFF/AE/AE0561M.aspx"
+HIDDEN_RE = {field: re.compile(r'(id="%s"[^>]*value=")[^"]*(")' % field) for field in FORM_FIELDS}
+ERROR_PAGE = ("<html><head><title>Validation of viewstate MAC failed.</title></head>"
+              "<body><h1>Server Error in '/' Application.</h1></body></html>")
+
+
+# 합성 페이지
+def synth_buildings(count):
+    names = ['제1공학관', '제4공학관', '제5공학관(제2자연관)', '건강과학관(제1자연관)', '교육관',
+             '제1경영관(제1경상관)', '문무관', '제2경영관(제2경상관)', '창조관', '산학협력관',
+             '디자인관', '법정관', '예술관', '고운관(인문관)', '성훈관(제3공학관)', '국제어학관(국제교육관)', '한마관']
+    return [(f"{i + 1:02d}", names[i % len(names)] if i < len(names) else f"가상관{i + 1}") for i in range(count)]
+
+def synth_rows(code, count, seed=0):
+    """건물별로 항상 같은 예약 행 생성 (셀 8개)"""
+    rnd = random.Random(f"{seed}:{code}")
+    base = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = []
+    for i in range(count):
+        day = base + timedelta(days=rnd.randint(-3, 10))
+        start = day.replace(hour=rnd.randint(8, 20), minute=rnd.choice((0, 30)))
+        end = start + timedelta(minutes=rnd.choice((50, 75, 90, 120)))
+        rows.append((
+            str(i + 1), f"{rnd.randint(1, 9)}{rnd.randint(0, 1)}{rnd.randint(1, 9)}호",
+            f"학생{rnd.randint(1, 999)}", "스터디",
+            f"{start:%Y.%m.%d %H:%M} ~ {end:%Y.%m.%d %H:%M}", "", "", rnd.choice(("승인", "대기", "취소"))
+        ))
+    return rows
+
+def render_page(buildings, selected, rows):
+    options = ['<option value="%">전체</option>']
+    for code, name in buildings:
+        attr = ' selected="selected"' if code == selected else ''
+        options.append(f'<option{attr} value="{code}">{code} {escape(name)}</option>')
+    header = "<tr>" + "".join(f"<td>{h}</td>" for h in ("번호", "강의실", "신청자", "용도", "사용시간", "비고", "연락처", "상태")) + "</tr>"
+    body = "".join("<tr>" + "".join(f"<td>{escape(c)}</td>" for c in row) + "</tr>" for row in rows)
+    hidden = "".join(f'<input type="hidden" name="{f}" id="{f}" value="" />\n' for f in FORM_FIELDS)
+    return (
+        '<html><head><title>강의실 사용 현황</title></head><body>\n'
+        '<form name="form1" method="post" action="./AE0561M.aspx" id="form1">\n'
+        f'{hidden}'
+        f'<select name="slct_arg_bldg_cd" id="slct_arg_bldg_cd">{"".join(options)}</select>\n'
+        f'<table id="dataGrid" cellspacing="0" border="1">{header}{body}</table>\n'
+        '</form></body></html>'
+    )
+
+
+# 대역 서버
+class FakeKutis:
+    """페이지 원본과 발급한 폼 상태를 보관하는 서버 상태"""
+    def __init__(self, fixtures=None, buildings=17, rows=120, viewstate_size=150000,
+                 latency=0.0, error_rate=0.0, reject_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.viewstate_size = viewstate_size
+        self.random = random.Random(seed)
+        self.pages = {}         # 건물 코드('' = 첫 페이지) → HTML
+        self.issued = deque(maxlen=256)
+        self.stats = {'get': 0, 'post': 0, 'rejected': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        if fixtures:
+            self.load_fixtures(fixtures)
+        else:
+            bldgs = synth_buildings(buildings)
+            self.pages[''] = render_page(bldgs, None, [])
+            for code, _ in bldgs:
+                self.pages[code] = render_page(bldgs, code, synth_rows(code, rows, seed))
+        self.buildings = parse_building_list(self.pages[''])
+
+    def load_fixtures(self, path):
+        """녹화 디렉터리: index.html + <건물코드>.html"""
+        for fname in os.listdir(path):
+            if fname.endswith('.html'):
+                with open(os.path.join(path, fname), encoding='utf-8') as f:
+                    key = fname[:-5]
+                    self.pages['' if key == 'index' else key] = f.read()
+        if '' not in self.pages:
+            raise ValueError(f"{path}에 index.html이 없습니다")
+
+    def issue_state(self, html):
+        """페이지의 hidden 필드를 새로 발급한 값으로 교체"""
+        token = base64.b64encode(self.random.getrandbits(96).to_bytes(12, 'big')).decode()
+        pad = 'A' * max(0, self.viewstate_size - len(token))
+        with self._lock:
+            self.issued.append(token)
+        values = {'__VIEWSTATE': token + pad, '__EVENTVALIDATION': token, '__VIEWSTATEGENERATOR': 'C2EE9ABB'}
+        for field, pattern in HIDDEN_RE.items():
+            html = pattern.sub(lambda m: m.group(1) + values[field] + m.group(2), html, count=1)
+        return html
+
+    def accept_state(self, form):
+        token = form.get('__EVENTVALIDATION', [''])[0]
+        with self._lock:
+            if token not in self.issued:
+                return False
+            if self.reject_rate and self.random.random() < self.reject_rate:
+                self.issued.clear()
+                return False
+        return True
+
+
+def make_handler(kutis):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            kutis.stats['get'] += 1
+            if not self._prepare():
+                return
+            self._send(200, kutis.issue_state(kutis.pages['']))
+
+        def do_POST(self):
+            kutis.stats['post'] += 1
+            length = int(self.headers.get('Content-Length', 0))
+            form = parse_qs(self.rfile.read(length).decode('utf-8'))
+            if not self._prepare():
+                return
+            if not kutis.accept_state(form):
+                kutis.stats['rejected'] += 1
+                self._send(500, ERROR_PAGE)
+                return
+            code = form.get('slct_arg_bldg_cd', [''])[0]
+            self._send(200, kutis.issue_state(kutis.pages.get(code, kutis.pages[''])))
+
+        def _prepare(self):
+            if self.path.split('?')[0] != FORM_PATH:
+                self._send(404, "<html><body>Not Found</body></html>")
+                return False
+            if kutis.latency:
+                time.sleep(kutis.latency)
+            if kutis.error_rate and kutis.random.random() < kutis.error_rate:
+                kutis.stats['errors'] += 1
+                self._send(503, "<html><body>Service Unavailable</body></html>")
+                return False
+            return True
+
+        def _send(self, status, html):
+            body = html.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    return Handler
+
+
+def start_server(kutis, host='127.0.0.1', port=0):
+    """백그라운드 스레드로 서버 시작 → (서버, AE0561M URL)"""
+    server = ThreadingHTTPServer((host, port), make_handler(kutis))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{FORM_PATH}"
+
+
+# 녹화
+def record_fixtures(out_dir, url=KUTIS_URL, codes=None):
+    """실제 KUTIS의 첫 페이지와 건물별 POST 결과를 그대로 저장"""
+    os.makedirs(out_dir, exist_ok=True)
+    session = requests.Session()
+    res = session.get(url, verify=False, timeout=30)
+    res.raise_for_status()
+    html = res.text
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(html)
+    for code, name in parse_building_list(html):
+        if codes and code not in codes:
+            continue
+        data = extract_form_state(html)
+        if data is None:
+            raise ValueError(f"{code}: 폼 상태 추출 실패")
+        data.update({'slct_arg_bldg_cd': code, '__EVENTTARGET': 'slct_arg_bldg_cd'})
+        res = session.post(url, data=data, verify=False, timeout=30)
+        res.raise_for_status()
+        html = res.text
+        with open(os.path.join(out_dir, f'{code}.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"[LOG][record_fixtures] {code} {name} 저장")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KUTIS AE0561M 대역 서버")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8561)
+    serve.add_argument('--fixtures', help="녹화 디렉터리 (없으면 합성 페이지)")
+    serve.add_argument('--buildings', type=int, default=17)
+    serve.add_argument('--rows', type=int, default=120)
+    serve.add_argument('--latency', type=float, default=0.0, help="요청당 지연(초)")
+    serve.add_argument('--error-rate', type=float, default=0.0, help="503 응답 비율")
+    serve.add_argument('--reject-rate', type=float, default=0.0, help="폼 상태 만료 비율")
+    record = sub.add_parser('record')
+    record.add_argument('out_dir')
+    record.add_argument('--codes', nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_fixtures(args.out_dir, codes=args.codes)
+    else:
+        kutis = FakeKutis(args.fixtures, buildings=args.buildings, rows=args.rows, latency=args.latency,
+                          error_rate=args.error_rate, reject_rate=args.reject_rate)
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(kutis))
+        print(f"[LOG][fake_kutis] http://{args.host}:{args.port}{FORM_PATH} ({len(kutis.buildings)}개 건물)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
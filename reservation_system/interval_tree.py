@@ -0,0 +1,156 @@
+import random
+from room_index import room_keys
+
+
+class _Node:
+    __slots__ = ('key', 'start', 'end', 'item', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, start, end, item):
+        self.key = (start, end, id(item))
+        self.start = start
+        self.end = end
+        self.item = item
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+def _split(node, key):
+    """key 미만 / key 이상 두 트리로 분할"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        return _update(node), right
+    left, node.left = _split(node.left, key)
+    return left, _update(node)
+
+def _merge(left, right):
+    """left의 모든 키 < right의 모든 키일 때 병합"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+# 구간 트리
+class IntervalTree:
+    """시작 시각 순 트립(treap)에 서브트리 최대 종료 시각을 덧붙인 구간 트리
+
+    삽입/삭제는 기대 O(log n), 겹침 조회는 O(log n + k).
+    """
+    def __init__(self):
+        self.root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        stack, node = [], self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.item
+            node = node.right
+
+    def insert(self, start, end, item):
+        node = _Node(start, end, item)
+        left, right = _split(self.root, node.key)
+        self.root = _merge(_merge(left, node), right)
+        self._size += 1
+
+    def remove(self, start, end, item):
+        """같은 객체(item)의 구간을 삭제. 없으면 False"""
+        key = (start, end, id(item))
+        left, rest = _split(self.root, key)
+        mid, right = _split(rest, (start, end, id(item) + 1))
+        removed = mid is not None
+        if removed:
+            mid = _merge(mid.left, mid.right)
+            self._size -= 1
+        self.root = _merge(_merge(left, mid), right)
+        return removed
+
+    def overlap(self, start, end):
+        """[start, end)와 겹치는 항목을 시작 시각 순으로 반환"""
+        result, stack, node = [], [], self.root
+        while stack or node is not None:
+            # max_end <= start인 서브트리는 통째로 건너뜀
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start:
+                result.append(node.item)
+            node = node.right
+        return result
+
+
+# 강의실별 구간 트리 + 충돌 표시
+class RoomIntervalTrees:
+    """(건물, 호수)별 구간 트리. 항목 하나를 넣고 뺄 때 관련 항목의 conflict만 갱신"""
+    def __init__(self, *sources):
+        self._trees = {}
+        for entries in sources:
+            for entry in entries:
+                self._insert(entry)
+
+    def tree(self, key):
+        return self._trees.get(key)
+
+    def overlapping(self, entry):
+        """entry와 같은 강의실에서 겹치는 다른 항목들"""
+        found = {}
+        for key in room_keys(entry):
+            tree = self._trees.get(key)
+            if tree is None:
+                continue
+            for other in tree.overlap(entry['start'], entry['end']):
+                if other is not entry:
+                    found[id(other)] = other
+        return list(found.values())
+
+    def add(self, entry):
+        """삽입 후 entry와 겹치는 항목 모두 충돌 표시. 겹친 항목 목록 반환"""
+        self._insert(entry)
+        others = self.overlapping(entry)
+        entry['conflict'] = bool(others)
+        for other in others:
+            other['conflict'] = True
+        return others
+
+    def remove(self, entry):
+        """삭제 후 entry와 겹쳤던 항목만 충돌 여부 재계산"""
+        others = self.overlapping(entry)
+        for key in room_keys(entry):
+            tree = self._trees.get(key)
+            if tree is not None:
+                tree.remove(entry['start'], entry['end'], entry)
+        for other in others:
+            other['conflict'] = bool(self.overlapping(other))
+        return others
+
+    def _insert(self, entry):
+        for key in room_keys(entry):
+            self._trees.setdefault(key, IntervalTree()).insert(entry['start'], entry['end'], entry)
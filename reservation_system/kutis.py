@@ -0,0 +1,535 @@
+import re
+import time
+import asyncio
+import threading
+from datetime import datetime
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+import requests
+
+KUTIS_URL = "https://kutis1.kyungnam.ac.kr/ADFF/AE/AE0561M.aspx"
+FORM_FIELDS = ('__VIEWSTATE', '__EVENTVALIDATION', '__VIEWSTATEGENERATOR')
+
+
+# 유틸 함수(파싱)
+def normalize_room_number(room_str):
+    """숫자만 추출해서 리스트로 반환"""
+    if isinstance(room_str, list):
+        room_str = ' '.join(str(x) for x in room_str)
+    nums = re.findall(r'\d{3,4}', str(room_str))
+    return nums or [str(room_str).strip() or "미지정"]
+
+def parse_time(time_str):
+    try:
+        # ex: 2024.06.12 09:00
+        time_str = re.sub(r'[^0-9]', '.', time_str)
+        parts = re.findall(r'\d+', time_str)
+        if len(parts) >= 5:
+            return datetime(*map(int, parts[:5]))
+        elif len(parts) == 3:
+            today = datetime.today()
+            return datetime(today.year, today.month, today.day, *map(int, parts[:3]))
+        else:
+            raise ValueError(f"잘못된 시간 형식: {time_str}")
+    except Exception as e:
+        print(f"[LOG][parse_time] 파싱 실패: {time_str}, 원인: {e}")
+        raise ValueError("시간 파싱에 실패했습니다.")
+
+# dataGrid 추출기
+class GridExtractor(HTMLParser):
+    """#dataGrid 표의 행만 뽑는 스트리밍 토크나이저 (BeautifulSoup 트리를 만들지 않음)"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._table_depth = 0   # dataGrid 안쪽 table 중첩 깊이(0이면 바깥)
+        self._row_index = -1
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            if self._table_depth:
+                self._table_depth += 1
+            elif dict(attrs).get('id') == 'dataGrid':
+                self._table_depth = 1
+        elif self._table_depth == 1:
+            if tag == 'tr':
+                self._row_index += 1
+                self._row = []
+            elif tag in ('td', 'th') and self._row is not None:
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if not self._table_depth:
+            return
+        if tag == 'table':
+            self._table_depth -= 1
+        elif self._table_depth == 1:
+            if tag in ('td', 'th') and self._cell is not None:
+                self._row.append(''.join(self._cell).strip())
+                self._cell = None
+            elif tag == 'tr' and self._row is not None:
+                # 첫 행은 헤더
+                if self._row_index > 0:
+                    self.rows.append(tuple(self._row))
+                self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def pop_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class BuildingOptionParser(HTMLParser):
+    """#slct_arg_bldg_cd 드롭다운의 (값, 표시 이름) 추출"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.options = []
+        self._in_select = False
+        self._value = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'select' and dict(attrs).get('id') == 'slct_arg_bldg_cd':
+            self._in_select = True
+        elif tag == 'option' and self._in_select:
+            self._flush()
+            self._value = dict(attrs).get('value', '')
+
+    def handle_endtag(self, tag):
+        if tag == 'option':
+            self._flush()
+        elif tag == 'select' and self._in_select:
+            self._flush()
+            self._in_select = False
+
+    def handle_data(self, data):
+        if self._value is not None:
+            self._text.append(data)
+
+    def _flush(self):
+        if self._value is not None:
+            self.options.append((self._value, ''.join(self._text).strip()))
+        self._value = None
+        self._text = []
+
+
+def clean_building_name(name):
+    return re.sub(r'^\d+\s*', '', name).strip()
+
+def parse_building_list(html):
+    """건물 드롭다운 → [(코드, 건물명)] ('%' 전체 항목 제외)"""
+    parser = BuildingOptionParser()
+    parser.feed(html)
+    parser.close()
+    return [(value, clean_building_name(text)) for value, text in parser.options if value != '%']
+
+GRID_START_RE = re.compile(r'<table\b[^>]*\bid\s*=\s*["\']?dataGrid["\'\s>]', re.I)
+TABLE_TAG_RE = re.compile(r'<(/?)table\b', re.I)
+VALUE_ATTR_RE = re.compile(r'\bvalue\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+ROW_RE = re.compile(r'<tr\b[^>]*>(.*?)</tr\s*>', re.I | re.S)
+CELL_RE = re.compile(r'<t[dh]\b[^>]*>(.*?)</t[dh]\s*>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]*>')
+
+# 페이지의 대부분은 150KB 안팎의 VIEWSTATE이므로 전체를 토크나이즈하지 않고
+# hidden 필드는 문자열 검색으로, dataGrid는 <table>~</table> 구간만 잘라 파싱한다
+def extract_form_fields(html):
+    """hidden 필드 3종의 {id: value} (값이 있는 것만)"""
+    state = {}
+    for field in FORM_FIELDS:
+        pos = html.find(f'id="{field}"')
+        if pos < 0:
+            pos = html.find(f"id='{field}'")
+        if pos < 0:
+            continue
+        tag = html[html.rfind('<', 0, pos):html.find('>', pos)]
+        m = VALUE_ATTR_RE.search(tag)
+        value = m and (m.group(1) if m.group(1) is not None else m.group(2))
+        if value:
+            state[field] = unescape(value)
+    return state
+
+def grid_fragment(html):
+    """<table id="dataGrid"> ... </table> 구간 (중첩 table 포함, 없으면 None)"""
+    m = GRID_START_RE.search(html)
+    if not m:
+        return None
+    depth = 0
+    for tag in TABLE_TAG_RE.finditer(html, m.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            close = html.find('>', tag.end())
+            return html[m.start():close + 1 if close >= 0 else len(html)]
+    return html[m.start():]
+
+def iter_grid_rows(html):
+    """dataGrid 본문 행을 셀 문자열 튜플로 하나씩 반환
+
+    DataGrid가 내보내는 평평한 표는 정규식으로 행/셀을 나누고, 안에 table이
+    중첩된 경우에만 GridExtractor로 토크나이즈한다.
+    """
+    grid = grid_fragment(html)
+    if grid is None:
+        return
+    if len(TABLE_TAG_RE.findall(grid)) > 2:
+        parser = GridExtractor()
+        parser.feed(grid)
+        parser.close()
+        yield from parser.pop_rows()
+        return
+    rows = ROW_RE.finditer(grid)
+    next(rows, None)    # 첫 행은 헤더
+    for row in rows:
+        yield tuple(unescape(TAG_RE.sub('', cell)).strip() for cell in CELL_RE.findall(row.group(1)))
+
+def parse_page(html):
+    """(dataGrid 행 목록, 폼 상태 또는 None) 반환"""
+    state = extract_form_fields(html)
+    return list(iter_grid_rows(html)), state if len(state) == len(FORM_FIELDS) else None
+
+def rows_to_reservations(rows, building_name):
+    """dataGrid 행 튜플을 예약 항목 딕셔너리 리스트로 변환"""
+    result = []
+    for cols in rows:
+        if len(cols) >= 8:
+            time_str = cols[4]
+            if ' ~ ' not in time_str:
+                continue
+            start_str, end_str = time_str.split(' ~ ')
+            try:
+                start_time = parse_time(start_str)
+                end_time = parse_time(end_str)
+            except ValueError:
+                continue
+            result.append({
+                'source': '웹사이트',
+                'building': building_name,
+                'room': normalize_room_number(cols[1]),
+                'time': time_str,
+                'person': cols[2],
+                'status': cols[7],
+                'conflict': False,
+                'start': start_time,
+                'end': end_time
+            })
+    return result
+
+def parse_reservations(html, building_name):
+    """dataGrid 행을 예약 항목 딕셔너리 리스트로 변환"""
+    return rows_to_reservations(iter_grid_rows(html), building_name)
+
+def extract_form_state(html):
+    """ASP.NET hidden 필드 3종 추출 (하나라도 없으면 None)"""
+    return parse_page(html)[1]
+
+
+# 폼 상태 캐시
+class FormStateCache:
+    """마지막 응답의 VIEWSTATE/EVENTVALIDATION을 보관해 다음 POST에 재사용"""
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            return dict(self._state) if self._state else None
+
+    def update(self, html):
+        return self.set(extract_form_state(html))
+
+    def set(self, state):
+        if state:
+            with self._lock:
+                self._state = dict(state)
+        return bool(state)
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+
+
+# 서킷 브레이커
+class CircuitOpenError(Exception):
+    """차단기가 열려 있어 요청을 보내지 않음"""
+
+
+class CircuitBreaker:
+    """연속 실패 시 요청을 즉시 실패시키고, reset_timeout 후 한 번 시험 요청을 허용"""
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """실패 기록. 이번 실패로 닫힘 → 열림이 되었으면 True"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                tripped = self.state == self.CLOSED
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return tripped
+            return False
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"요청 차단 중 (최근 {self.failures}회 실패)")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker_for(url):
+    """엔드포인트(호스트+경로)별 공유 차단기"""
+    parts = urlsplit(url)
+    key = (parts.netloc, parts.path)
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker()
+        return _breakers[key]
+
+
+# 동시 요청 합치기
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 한 번의 실행으로 합치고 결과를 공유"""
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+# 건물별 예약 캐시
+class ReservationCache:
+    """건물별 예약 TTL 캐시
+
+    TTL이 지난 항목은 그대로 즉시 반환하고, 백그라운드 스레드에서 다시 조회한 뒤
+    on_refresh(코드, 예약목록) 콜백으로 알린다.
+    """
+    def __init__(self, fetch, ttl=120):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._entries = {}      # 코드 → (조회 시각, 예약목록)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def get(self, code, force=False, on_refresh=None):
+        with self._lock:
+            cached = self._entries.get(code)
+        if force or cached is None:
+            try:
+                return self._fetch(code)
+            except CircuitOpenError:
+                if cached is None:
+                    raise
+                print(f"[LOG][ReservationCache] {code} 차단기 열림, 캐시 반환")
+                return cached[1]
+        fetched_at, data = cached
+        if time.monotonic() - fetched_at >= self.ttl:
+            self._refresh_in_background(code, on_refresh)
+        return data
+
+    def put(self, code, data):
+        with self._lock:
+            self._entries[code] = (time.monotonic(), data)
+
+    def peek(self, code):
+        """네트워크 없이 캐시된 예약목록만 반환 (없으면 None)"""
+        with self._lock:
+            cached = self._entries.get(code)
+        return cached[1] if cached else None
+
+    def invalidate(self, code=None):
+        with self._lock:
+            if code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(code, None)
+
+    def _fetch(self, code):
+        """같은 건물 조회가 진행 중이면 그 결과를 함께 기다림"""
+        def fetch_and_store():
+            data = self.fetch(code)
+            self.put(code, data)
+            return data
+        return self._flight.do(code, fetch_and_store)
+
+    def _refresh_in_background(self, code, on_refresh):
+        with self._lock:
+            if code in self._refreshing:
+                return
+            self._refreshing.add(code)
+        def run():
+            try:
+                data = self._fetch(code)
+                if on_refresh:
+                    on_refresh(code, data)
+            except Exception as e:
+                print(f"[LOG][ReservationCache] {code} 백그라운드 갱신 실패: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(code)
+        threading.Thread(target=run, daemon=True).start()
+
+
+# KUTIS 클라이언트
+class KutisClient:
+    """KUTIS AE0561M 클라이언트 (requests.Session을 쓰므로 스레드마다 따로 만든다)
+
+    rate_limiter(acquire()를 가진 객체, poller.RateLimiter)를 주면 GET/POST마다 토큰을 얻는다.
+    """
+    def __init__(self, url=KUTIS_URL, timeout=10, verify=False, form_state=None, breaker=None,
+                 rate_limiter=None):
+        self.url = url
+        self.timeout = timeout
+        self.verify = verify
+        self.session = requests.Session()
+        self.form_state = form_state or FormStateCache()
+        self.breaker = breaker or breaker_for(url)
+        self.rate_limiter = rate_limiter
+
+    def fetch_form_page(self):
+        """GET으로 폼 페이지를 받아 폼 상태 갱신"""
+        return self.breaker.call(self._fetch_form_page)
+
+    def post_building(self, building_code):
+        """건물 선택 POST 후 dataGrid 행 목록 반환 (차단기 열림 시 CircuitOpenError)"""
+        return self.breaker.call(self._post_building, building_code)
+
+    def _throttle(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def _fetch_form_page(self):
+        self._throttle()
+        res = self.session.get(self.url, verify=self.verify, timeout=self.timeout)
+        res.raise_for_status()
+        if not self.form_state.update(res.text):
+            raise ValueError("폼 상태(__VIEWSTATE) 추출 실패")
+        return res.text
+
+    def _post_building(self, building_code):
+        """캐시된 폼 상태로 POST, 거부될 때만 GET 후 재시도"""
+        state = self.form_state.get()
+        if state is None:
+            self._fetch_form_page()
+            state = self.form_state.get()
+        rows = self._post(building_code, state)
+        if rows is None:
+            print(f"[LOG][KutisClient] 폼 상태 거부됨, 재요청: {building_code}")
+            self.form_state.invalidate()
+            self._fetch_form_page()
+            rows = self._post(building_code, self.form_state.get())
+            if rows is None:
+                raise ValueError("서버가 폼 상태를 거부했습니다.")
+        return rows
+
+    def scrape_building(self, building_code, building_name):
+        return rows_to_reservations(self.post_building(building_code), building_name)
+
+    def _post(self, building_code, state):
+        data = dict(state)
+        data['slct_arg_bldg_cd'] = building_code
+        data['__EVENTTARGET'] = 'slct_arg_bldg_cd'
+        self._throttle()
+        res = self.session.post(self.url, data=data, verify=self.verify, timeout=self.timeout)
+        # ViewState MAC/EventValidation 오류는 500 또는 폼 없는 오류 페이지로 돌아옴.
+        # 502/503/504 같은 과부하 응답은 재시도하지 않고 그대로 실패시킨다
+        if res.status_code != 500:
+            res.raise_for_status()
+        rows, new_state = parse_page(res.text)
+        if res.status_code == 500 or not self.form_state.set(new_state):
+            return None
+        return rows
+
+
+# 전체 건물 동시 조회
+async def scrape_all_buildings(buildings, concurrency=8, timeout=10, url=KUTIS_URL, form_state=None,
+                               rate_limiter=None, breaker=None):
+    """(코드, 이름) 목록 전체를 동시 조회해 ({코드: 예약목록}, {코드: 오류}) 반환
+
+    requests 호출은 스레드에서 실행하고, 동시 요청 수는 concurrency개의
+    클라이언트 풀로 제한한다. 폼 상태, rate_limiter, 차단기(없으면 breaker_for(url))는
+    모든 클라이언트가 공유한다.
+    """
+    form_state = form_state or FormStateCache()
+    pool = asyncio.Queue()
+    for _ in range(max(1, concurrency)):
+        pool.put_nowait(KutisClient(url, timeout=timeout, form_state=form_state, rate_limiter=rate_limiter,
+                                    breaker=breaker))
+    loop = asyncio.get_running_loop()
+    results, errors = {}, {}
+
+    async def fetch(code, name):
+        client = await pool.get()
+        try:
+            results[code] = await loop.run_in_executor(None, client.scrape_building, code, name)
+        except Exception as e:
+            print(f"[LOG][scrape_all_buildings] {code}: {e}")
+            errors[code] = str(e)
+        finally:
+            pool.put_nowait(client)
+
+    await asyncio.gather(*(fetch(code, name) for code, name in buildings))
+    return results, errors
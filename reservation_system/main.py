@@ -1,11 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from tkcalendar import DateEntry
 import warnings
 import re
+import bisect
 import webbrowser
 from PIL import Image, ImageDraw, ImageTk
 import asyncio
@@ -15,8 +15,16 @@ import sys
 import os
 import platform
 import winreg
+import threading
+import time
 import nest_asyncio
-import xml.etree.ElementTree as ET
+from kutis import (KutisClient, FormStateCache, ReservationCache, KUTIS_URL,
+                   breaker_for, parse_time, parse_building_list, scrape_all_buildings)
+from poller import PollingScheduler, RateLimiter, reservation_snapshot
+from room_index import canonical_building, parse_room_number, reservation_key
+from mirror_store import MirrorStore
+from sqlite_store import ReservationDB
+from engine import ReservationEngine, parse_time_code, is_time_overlap
 
 nest_asyncio.apply()
 
@@ -25,29 +33,28 @@ if sys.platform == 'win32':
 
 warnings.filterwarnings('ignore', category=requests.packages.urllib3.exceptions.InsecureRequestWarning)
 
-# 유틸 함수(정규화/네트워크)
-def normalize_room_number(room_str):
-    """숫자만 추출해서 리스트로 반환"""
-    if isinstance(room_str, list):
-        room_str = ' '.join(str(x) for x in room_str)
-    nums = re.findall(r'\d{3,4}', str(room_str))
-    return nums or [str(room_str).strip() or "미지정"]
-
-def normalize_building_name(name, building_code_map):
-    """건물 이름 표준화"""
-    return building_code_map.get(name, name)
-
+# 유틸 함수(네트워크)
 def safe_request(*args, **kwargs):
+    """GET 요청. 엔드포인트 차단기가 열려 있으면 바로 None (오류 창은 장애의 첫 실패에서만 표시)"""
+    breaker = breaker_for(args[0])
+    if not breaker.allow():
+        print(f"[LOG][safe_request] 차단기 열림, 요청 생략: {args[0]}")
+        return None
     try:
         response = requests.get(*args, timeout=10, **kwargs)
         response.raise_for_status()
+        breaker.record_success()
         return response
     except requests.exceptions.Timeout:
-        messagebox.showerror("네트워크 오류", "서버 응답이 느립니다. 잠시 후 재시도해주세요.")
+        title, message = "네트워크 오류", "서버 응답이 느립니다. 잠시 후 재시도해주세요."
     except requests.exceptions.ConnectionError:
-        messagebox.showerror("네트워크 오류", "인터넷 연결을 확인해주세요.")
+        title, message = "네트워크 오류", "인터넷 연결을 확인해주세요."
     except Exception as e:
-        messagebox.showerror("시스템 오류", f"알 수 없는 네트워크 오류: {e}")
+        title, message = "시스템 오류", f"알 수 없는 네트워크 오류: {e}"
+    breaker.record_failure()
+    # 성공하면 failures가 0으로 돌아가므로, 1이면 이번 장애의 첫 실패
+    if breaker.failures == 1:
+        messagebox.showerror(title, message)
     return None
 
 # 커스텀 라운드 버튼
@@ -116,58 +123,124 @@ class ClassroomReservationSystem:
         self.current_version = "1.3.2"
         self.repo_url = "https://github.com/Nyxthorn/work/releases"
 
-        self.website_data = []
-        self.manual_data = []
-        self.lecture_data = []
+        self.row_order = []     # (시작 시각, 행 id) 정렬 목록
         self.cached_buildings = None
-        self.cached_xml = None
         self.xml_url = "https://raw.githubusercontent.com/Nyxthorn/work/main/data.xml"
+        self.form_state = FormStateCache()
+        # KUTIS로 나가는 모든 요청(화면, 백그라운드 갱신, 폴링, 전체 건물 조회)이 공유하는 속도 제한
+        self.rate_limiter = RateLimiter(rate=4, burst=8)
+        self._clients = threading.local()   # requests.Session은 스레드마다 따로 둠
+        # 미러 데몬(mirror_daemon.py) 저장소가 있으면 업스트림보다 먼저 읽음
+        self.mirror_path = os.environ.get("KUTIS_MIRROR")
+        self.mirror_max_age = 300
+        self.mirror = MirrorStore(self.mirror_path) if self.mirror_path else None
+        self.scrape_concurrency = 8
+        self.scrape_timeout = 10
+        self.cache_ttl = 120
+        self.outage_reported = False    # 장애 중 오류 창은 한 번만
+        self.reservation_cache = ReservationCache(self.fetch_building_reservations, ttl=self.cache_ttl)
+        self.poll_interval = 60
+        self.watched_buildings = set()  # 관심 건물 코드 (KUTIS_WATCH 또는 '변경 감시' 체크)
+        self.poller = PollingScheduler(self.poll_building, interval=self.poll_interval)
+        # 강의/예약 데이터와 충돌 인덱스는 엔진이 보관 (GUI는 네트워크와 화면만 담당)
+        self.engine = ReservationEngine(xml_loader=self.fetch_xml, reservations=self.reservation_cache,
+                                        fetch_many=self.fetch_many_buildings)
+        # 수동 입력/조회 이력/강의 시간표 영구 저장 (앱을 다시 열어도 수동 입력 유지)
+        self.db = ReservationDB(os.environ.get("KUTIS_DB", "reservations.db"))
+        self.engine.manual_data.extend(dict(e, conflict=False) for e in self.db.manual_entries())
+        # 저장된 강의 시간표가 lecture_max_age초 이내에 받은 것이면 시작할 때 XML을 받지 않음
+        self.lecture_max_age = 24 * 3600
+        fetched_at = self.db.lectures_fetched_at()
+        if fetched_at is not None and time.time() - fetched_at <= self.lecture_max_age:
+            self.use_stored_lectures()
 
         self.buildings = self.get_building_list()
+        self.engine.buildings = self.buildings
+        self.db.upsert_buildings(self.buildings)
         self.building_dict = {name: code for code, name in self.buildings} if self.buildings else {}
-        self.building_code_map = self.create_building_code_map()
+        self.watched_buildings = self.parse_watch_setting(os.environ.get("KUTIS_WATCH", ""))
 
         self.setup_style()
         self.setup_ui()
         self.create_login_ui()
         self.login_frame.pack_forget()
         self.load_xml_data()
+        self.update_display()   # DB에서 복원한 수동 입력 표시 (웹 예약은 이후 변경분으로 추가)
 
         if self.buildings:
             self.load_initial_data()
+            for code in self.watched_buildings:
+                self.poller.watch(code)
+            self.poller.start()
         else:
             messagebox.showerror("초기화 오류", "건물 목록을 불러올 수 없습니다. 인터넷 연결을 확인해주세요.")
 
-    # ========= 유틸 ==========
-    def create_building_code_map(self):
-        return {
-            # 축약 및 역매핑
-            '1공': '제1공학관', '4공': '제4공학관', '5공': '제5공학관(제2자연관)', '건': '건강과학관(제1자연관)', '교': '교육관',
-            '경': '제1경영관(제1경상관)', '문': '문무관', '2경': '제2경영관(제2경상관)', '창': '창조관', '산': '산학협력관',
-            '디': '디자인관', '법': '법정관', '예': '예술관', '고운': '고운관(인문관)', '성훈': '성훈관(제3공학관)',
-            '국': '국제어학관(국제교육관)', '한': '한마관',
-            '제1공학관': '1공', '제4공학관': '4공', '제5공학관(제2자연관)': '5공', '건강과학관(제1자연관)': '건', '교육관': '교',
-            '제1경영관(제1경상관)': '경', '문무관': '문', '제2경영관(제2경상관)': '2경', '창조관': '창', '산학협력관': '산',
-            '디자인관': '디', '법정관': '법', '예술관': '예', '고운관(인문관)': '고운', '성훈관(제3공학관)': '성훈',
-            '국제어학관(국제교육관)': '국', '한마관': '한'
-        }
+    # ========= 엔진 데이터 ==========
+    @property
+    def lecture_data(self):
+        return self.engine.lecture_data
+
+    @property
+    def website_data(self):
+        return self.engine.website_data
+
+    @website_data.setter
+    def website_data(self, data):
+        self.engine.website_data = data
+
+    @property
+    def manual_data(self):
+        return self.engine.manual_data
 
     # ========= 네트워크 요청 및 캐싱 ==========
+    def kutis_client(self):
+        """현재 스레드 전용 KutisClient (폼 상태/차단기/속도 제한은 공유)"""
+        client = getattr(self._clients, 'client', None)
+        if client is None:
+            client = self._clients.client = KutisClient(form_state=self.form_state,
+                                                        rate_limiter=self.rate_limiter)
+        return client
+
+    def parse_watch_setting(self, value):
+        """'제1공학관,한마관'처럼 쉼표로 나눈 건물 이름/코드 → 건물 코드 집합 (모르는 이름은 무시)"""
+        codes = set()
+        for item in filter(None, (part.strip() for part in value.split(','))):
+            code = self.building_dict.get(canonical_building(item), self.building_dict.get(item))
+            if code is None and item in {c for c, _ in self.buildings}:
+                code = item
+            if code is None:
+                print(f"[LOG][parse_watch_setting] 알 수 없는 건물: {item}")
+                continue
+            codes.add(code)
+        return codes
+
+    def toggle_watch(self):
+        """현재 건물을 관심 건물(폴링 대상)에 넣거나 뺌"""
+        selected_index = self.building_combo.current()
+        if not 0 <= selected_index < len(self.buildings):
+            return
+        code = self.buildings[selected_index][0]
+        if self.watch_var.get():
+            self.watched_buildings.add(code)
+            self.poller.watch(code)
+        else:
+            self.watched_buildings.discard(code)
+            self.poller.unwatch(code)
+
     def get_building_list(self):
         """건물 목록을 캐싱하며 반환"""
         if self.cached_buildings:
             return self.cached_buildings
-        url = "https://kutis1.kyungnam.ac.kr/ADFF/AE/AE0561M.aspx"
-        response = safe_request(url, verify=False)
+        if self.mirror and self.mirror.buildings():
+            self.cached_buildings = self.mirror.buildings()
+            return self.cached_buildings
+        response = safe_request(KUTIS_URL, verify=False)
         if not response:
             return []
         try:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            bldg_list = [
-                (opt['value'], self.clean_building_name(opt.text.strip()))
-                for opt in soup.select('#slct_arg_bldg_cd option')
-                if opt['value'] != '%'
-            ]
+            # 건물 목록 페이지의 폼 상태를 첫 POST에 재사용
+            self.form_state.update(response.text)
+            bldg_list = parse_building_list(response.text)
             self.cached_buildings = bldg_list
             return bldg_list
         except Exception as e:
@@ -175,187 +248,124 @@ class ClassroomReservationSystem:
             messagebox.showerror("오류", f"건물 목록 조회 실패: {str(e)}")
             return []
 
+    def fetch_xml(self):
+        """강의 XML 바이트 (미러 우선, 실패 시 None)"""
+        content = self.mirror.lectures_xml() if self.mirror else None
+        if content is not None:
+            return content
+        response = safe_request(self.xml_url, verify=False)
+        return response.content if response else None
+
     def load_xml_data(self, reference_date=None):
         """XML 강의 데이터 로드(캐싱 지원)"""
-        if self.cached_xml and reference_date is None:
-            self.lecture_data = self.cached_xml
-            return
-        response = safe_request(self.xml_url, verify=False)
-        if not response:
-            self.lecture_data = []
-            return
         try:
-            root = ET.fromstring(response.content)
-            self.lecture_data = []
-            for lecture in root.findall('Lecture'):
-                name = lecture.find('Name').text.strip() if lecture.find('Name') is not None else "이름 없는 강의"
-                try:
-                    raw_times = lecture.find('Time').text.strip()
-                    raw_rooms = lecture.find('Room').text.strip()
-                    expanded_times = []
-                    for time_part in raw_times.split(','):
-                        time_part = time_part.strip()
-                        if '-' in time_part:
-                            day = time_part[0]
-                            start_end = time_part[1:].split('-')
-                            if len(start_end) == 2:
-                                start, end = start_end
-                                for i in range(int(start), int(end)+1):
-                                    expanded_times.append(f"{day}{i}")
-                        else:
-                            expanded_times.append(time_part)
-                    rooms = [r.strip() for r in raw_rooms.split(',') if r.strip()]
-                    if not rooms:
-                        continue
-                    if len(rooms) < len(expanded_times):
-                        rooms *= len(expanded_times)
-                    for time_code, room_str in zip(expanded_times, rooms):
-                        alt_names = re.findall(r'\((.*?)\)', room_str)
-                        base_room = re.sub(r'\(.*?\)', '', room_str).strip()
-                        parts = base_room.split('-', 1)
-                        building_part = parts[0].strip()
-                        room_part = parts[1].strip() if len(parts) > 1 else building_part
-                        building = normalize_building_name(building_part, self.building_code_map)
-                        all_room_names = [room_part] + [alt.strip() for alt in alt_names if alt.strip()]
-                        time_ranges = self.parse_time_code(time_code, reference_date=reference_date)
-                        for start, end in time_ranges:
-                            for room_name in all_room_names:
-                                self.lecture_data.append({
-                                    'building': building,
-                                    'room': room_name,
-                                    'start': start,
-                                    'end': end,
-                                    'source': '수업',
-                                    'name': name
-                                })
-                except Exception as e:
-                    print(f"🚫 강의 '{name}' 처리 실패: {str(e)}")
-                    continue
-            if reference_date is None:
-                self.cached_xml = self.lecture_data.copy()
+            loaded = self.engine.load_xml_data(reference_date)
+            if loaded and reference_date is None and self.engine.xml_content is not None:
+                self.db.replace_lectures(self.engine.get_weekly_lectures(), self.engine.room_labels)
+            elif not loaded and self.use_stored_lectures():
+                # XML을 받지 못하면 마지막으로 저장한 시간표로 대신함 (오래됐어도)
+                self.engine.load_xml_data(reference_date)
         except Exception as e:
             print(f"[LOG][load_xml_data] {e}")
             messagebox.showwarning("오류", f"XML 처리 실패: {str(e)}")
-            self.lecture_data = []
 
-    def scrape_website_data(self, building_code):
+    def use_stored_lectures(self):
+        """DB의 강의 시간표/강의실 별칭을 엔진에 넘김. 저장된 시간표가 없으면 False"""
+        stored_lectures = self.db.weekly_lectures()
+        if not stored_lectures:
+            return False
+        self.engine.use_stored_lectures(stored_lectures, self.db.room_labels())
+        return True
+
+    def fetch_building_reservations(self, building_code):
+        if self.mirror:
+            entries = self.mirror.reservations(building_code, max_age=self.mirror_max_age)
+            if entries is not None:
+                return entries
+        return self.kutis_client().scrape_building(building_code, self.get_building_name(building_code))
+
+    def scrape_website_data(self, building_code, force=False, fail_fast=True):
+        """캐시 우선 조회, force=True면 항상 새로 조회
+
+        조회에 실패하면(차단기 열림 포함) 캐시된 목록을 반환한다. 캐시도 없으면
+        fail_fast=True일 때 빈 목록, False일 때 예외를 그대로 올린다.
+        오류 창은 장애 한 번(다음 조회 성공 전까지)에 한 번만 띄운다.
+        """
         try:
-            session = requests.Session()
-            url = "https://kutis1.kyungnam.ac.kr/ADFF/AE/AE0561M.aspx"
-            res = session.get(url, verify=False)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            viewstate = soup.find('input', {'id': '__VIEWSTATE'})['value']
-            event_val = soup.find('input', {'id': '__EVENTVALIDATION'})['value']
-            view_gen = soup.find('input', {'id': '__VIEWSTATEGENERATOR'})['value']
-            data = {
-                '__VIEWSTATE': viewstate,
-                '__EVENTVALIDATION': event_val,
-                '__VIEWSTATEGENERATOR': view_gen,
-                'slct_arg_bldg_cd': building_code,
-                '__EVENTTARGET': 'slct_arg_bldg_cd'
-            }
-            res = session.post(url, data=data, verify=False)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            result = []
-            for row in soup.select('#dataGrid tr:not(:first-child)'):
-                cols = row.find_all('td')
-                if len(cols) >= 8:
-                    time_str = cols[4].text.strip()
-                    if ' ~ ' not in time_str:
-                        continue
-                    start_str, end_str = time_str.split(' ~ ')
-                    try:
-                        start_time = self.parse_time(start_str)
-                        end_time = self.parse_time(end_str)
-                    except ValueError:
-                        continue
-                    result.append({
-                        'source': '웹사이트',
-                        'building': self.get_building_name(building_code),
-                        'room': normalize_room_number(cols[1].text.strip()),
-                        'time': time_str,
-                        'person': cols[2].text.strip(),
-                        'status': cols[7].text.strip(),
-                        'conflict': False,
-                        'start': start_time,
-                        'end': end_time
-                    })
-            return result
+            data = self.reservation_cache.get(building_code, force=force,
+                                              on_refresh=self.on_building_refreshed)
         except Exception as e:
             print(f"[LOG][scrape_website_data] {building_code}: {e}")
-            messagebox.showerror("오류", f"데이터 조회 실패: {str(e)}")
-            return []
+            cached = self.reservation_cache.peek(building_code)
+            if cached is None and not fail_fast:
+                raise
+            if not self.outage_reported:
+                self.outage_reported = True
+                messagebox.showerror("오류", f"데이터 조회 실패: {str(e)}")
+            return cached if cached is not None else []
+        self.outage_reported = False
+        return data
+
+    def on_building_refreshed(self, code, data):
+        """백그라운드 갱신 결과를 GUI 스레드에서 반영"""
+        self.safe_gui_update(self.apply_building_data, code, data)
+
+    def apply_building_data(self, code, data):
+        selected_index = self.building_combo.current()
+        if 0 <= selected_index < len(self.buildings) and self.buildings[selected_index][0] == code:
+            self.set_website_data(data)
 
-    def clean_building_name(self, name):
-        return re.sub(r'^\d+\s*', '', name).strip()
+    def poll_building(self, code):
+        """폴링 스레드에서 호출: 다시 조회해 변경이 있으면 화면 반영 후 True"""
+        before = self.reservation_cache.peek(code)
+        data = self.reservation_cache.get(code, force=True)
+        if before is not None and reservation_snapshot(before) == reservation_snapshot(data):
+            self.safe_gui_update(self.db.touch_reservations, data)  # DB 연결은 Tk 스레드 전용
+            return False
+        self.safe_gui_update(self.apply_building_data, code, data)
+        return True
+
+    def refresh_all_buildings(self):
+        """전체 건물 예약을 백그라운드에서 동시 조회"""
+        buildings = list(self.buildings)
+        if not buildings:
+            return
+        async def async_task():
+            return await scrape_all_buildings(
+                buildings,
+                concurrency=self.scrape_concurrency,
+                timeout=self.scrape_timeout,
+                form_state=self.form_state,
+                rate_limiter=self.rate_limiter
+            )
+        def run_async():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                results, errors = loop.run_until_complete(async_task())
+            finally:
+                loop.close()
+            self.safe_gui_update(self.apply_campus_data, results, errors)
+        threading.Thread(target=run_async, daemon=True).start()
+
+    def apply_campus_data(self, results, errors):
+        """전체 건물 조회 결과를 검색/충돌 검사 대상으로 반영"""
+        for code, entries in results.items():
+            self.reservation_cache.put(code, entries)
+        self.website_data = [entry for code, _ in self.buildings for entry in results.get(code, [])]
+        self.db.upsert_reservations(self.website_data)
+        self.update_display()
+        self.update_search()
+        if errors:
+            failed = ', '.join(self.get_building_name(code) for code in errors)
+            messagebox.showwarning("일부 조회 실패", f"다음 건물의 예약을 불러오지 못했습니다:\n{failed}")
 
     # ========= 파서/시간 처리 ==========
     def parse_time(self, time_str):
-        try:
-            # ex: 2024.06.12 09:00
-            time_str = re.sub(r'[^0-9]', '.', time_str)
-            parts = re.findall(r'\d+', time_str)
-            if len(parts) >= 5:
-                return datetime(*map(int, parts[:5]))
-            elif len(parts) == 3:
-                today = datetime.today()
-                return datetime(today.year, today.month, today.day, *map(int, parts[:3]))
-            else:
-                raise ValueError(f"잘못된 시간 형식: {time_str}")
-        except Exception as e:
-            print(f"[LOG][parse_time] 파싱 실패: {time_str}, 원인: {e}")
-            raise ValueError("시간 파싱에 실패했습니다.")
+        return parse_time(time_str)
 
     def parse_time_code(self, time_code, reference_date=None, days_ahead=6):
-        try:
-            time_code = str(time_code).strip().upper()
-            if len(time_code) < 1:
-                return []
-            day_char = time_code[0]
-            kor_to_eng = {'월':'M','화':'T','수':'W','목':'R','금':'F','토':'S','일':'U'}
-            if day_char not in kor_to_eng:
-                raise ValueError(f"잘못된 요일 코드: {time_code}")
-            day_num = kor_to_eng[day_char]
-            day_map = {'M':0, 'T':1, 'W':2, 'R':3, 'F':4, 'S':5, 'U':6}
-            target_weekday = day_map[day_num]
-            base_date = reference_date or datetime.today()
-            period_str = time_code[1:]
-            periods = []
-            for part in period_str.split(','):
-                part = part.strip()
-                if '-' in part:
-                    start, end = part.split('-', 1)
-                    current = start
-                    while True:
-                        periods.append(current)
-                        if current == end: break
-                        current = str(int(current)+1) if current.isdigit() else chr(ord(current)+1)
-                else:
-                    periods.append(part)
-            time_ranges = []
-            for day_offset in range(-days_ahead, days_ahead +1):
-                current_date = base_date + timedelta(days=day_offset)
-                if current_date.weekday() != target_weekday:
-                    continue
-                for period in periods:
-                    if period.isdigit():
-                        period_num = int(period)
-                        if not 1 <= period_num <= 14: continue
-                        start_time = current_date.replace(hour=9 + (period_num - 1), minute=0)
-                        end_time = start_time + timedelta(minutes=50)
-                    elif period.isalpha() and len(period) == 1:
-                        idx = ord(period.upper()) - ord('A')
-                        start_min = 540 + 90 * idx
-                        hours, mins = divmod(start_min, 60)
-                        start_time = current_date.replace(hour=hours, minute=mins)
-                        end_time = start_time + timedelta(minutes=75)
-                    else:
-                        continue
-                    time_ranges.append((start_time, end_time))
-            return time_ranges
-        except Exception as e:
-            print(f"[LOG][parse_time_code] {time_code} ({e})")
-            return []
+        return parse_time_code(time_code, reference_date, days_ahead)
 
     def get_building_name(self, code):
         return next((name for c, name in self.buildings if c == code), "알 수 없음")
@@ -410,6 +420,9 @@ class ClassroomReservationSystem:
         self.building_combo['values'] = [name for code, name in self.buildings]
         self.building_combo.pack(side=tk.LEFT, padx=5)
         self.building_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_data(reload_web=True))
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="변경 감시", variable=self.watch_var,
+                        command=self.toggle_watch).pack(side=tk.LEFT, padx=5)
         btn_frame = ttk.Frame(control_frame)
         btn_frame.pack(side=tk.RIGHT, padx=10)
         self.apply_btn = RoundedButton(btn_frame, text="공간사용신청",
@@ -417,9 +430,13 @@ class ClassroomReservationSystem:
                                      width=120, height=36)
         self.apply_btn.pack(side=tk.LEFT, padx=2)
         self.refresh_btn = RoundedButton(btn_frame, text="새로고침",
-                                       command=lambda: self.refresh_data(reload_xml=True, reload_web=True),
+                                       command=lambda: self.refresh_data(reload_xml=True, reload_web=True, force=True),
                                        width=100, height=36)
         self.refresh_btn.pack(side=tk.LEFT, padx=2)
+        self.campus_btn = RoundedButton(btn_frame, text="전체 건물 조회",
+                                      command=self.refresh_all_buildings,
+                                      width=120, height=36)
+        self.campus_btn.pack(side=tk.LEFT, padx=2)
         self.check_btn = RoundedButton(btn_frame, text="사용 가능 조회",
                                      command=self.open_check_dialog,
                                      width=120, height=36)
@@ -442,6 +459,7 @@ class ClassroomReservationSystem:
             self.tree.column(col, width=width, anchor=anchor, stretch=True)
         ttk.Separator(main_frame, orient='horizontal').pack(fill='x', pady=5)
         self.tree.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
+        self.tree.bind('<Delete>', lambda e: self.delete_entry())
 
     def toggle_login_frame(self):
         if self.login_frame.winfo_ismapped():
@@ -580,46 +598,136 @@ class ClassroomReservationSystem:
         return None
 
     # ============= 데이터 처리 =============
-    def refresh_data(self, reload_xml=False, reload_web=True):
-        """불필요한 전체 로딩 방지, 캐시 활용"""
+    def refresh_data(self, reload_xml=False, reload_web=True, force=False):
+        """불필요한 전체 로딩 방지, 캐시 활용 (force=True면 예약 캐시 무시)"""
         if reload_xml:
-            self.cached_xml = None
+            self.engine.reset_lectures()
             self.load_xml_data()
         if self.building_var.get() and reload_web:
             selected_index = self.building_combo.current()
             if selected_index >= 0 and selected_index < len(self.buildings):
                 code = self.buildings[selected_index][0]
-                self.website_data = self.scrape_website_data(code)
-            self.update_display()
+                self.set_website_data(self.scrape_website_data(code, force=force))
+                self.poller.set_current(code)
+                self.watch_var.set(code in self.watched_buildings)
         messagebox.showinfo("새로고침 완료", "최신 데이터로 갱신되었습니다.")
 
+    def set_website_data(self, data):
+        """웹 예약을 새 조회 결과로 교체하고 변경분만 화면/충돌 인덱스에 반영"""
+        delta = self.engine.set_website_data(data)
+        self.db.upsert_reservations(delta['added'] + delta['changed'])
+        self.db.touch_reservations(data)
+        if any(delta.values()):
+            self.apply_display_delta(delta)
+
+    def add_manual_entry(self, entry):
+        """수동 예약 추가. 겹치는 항목만 충돌 표시 갱신"""
+        entry = self.engine.add_manual_entry(entry)
+        self.db.upsert_reservations([entry])
+        self.apply_display_delta({'added': [entry], 'removed': [], 'changed': []})
+        return entry
+
+    def delete_entry(self):
+        """선택한 수동 예약 삭제. 겹쳤던 항목만 충돌 표시 재계산"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        removed = [e for e in self.manual_data if self.row_id(e) == selected[0]]
+        if not removed:
+            return
+        self.engine.remove_manual_entries(removed)
+        self.db.delete_reservations(removed)
+        self.apply_display_delta({'added': [], 'removed': removed, 'changed': []})
+
+    def row_id(self, entry):
+        return '|'.join(str(part) for part in reservation_key(entry))
+
+    def row_values(self, entry):
+        time_str = f"{entry['start'].strftime('%Y.%m.%d %H:%M')} ~ {entry['end'].strftime('%H:%M')}"
+        return (entry['source'], entry['building'], entry['room'], time_str,
+                entry['person'], entry['status'])
+
     def update_display(self):
         self.check_conflicts()
         self.tree.delete(*self.tree.get_children())
+        self.row_order = []
         all_entries = sorted(self.website_data + self.manual_data, key=lambda x: x['start'])
         for idx, entry in enumerate(all_entries):
+            iid = self.row_id(entry)
+            if self.tree.exists(iid):
+                continue
+            tags = ('EvenRow',) if idx % 2 == 0 else ('OddRow',)
+            self.tree.insert('', 'end', iid=iid, values=self.row_values(entry), tags=tags)
+            self.row_order.append((entry['start'], iid))
+
+    def apply_display_delta(self, delta):
+        """추가/삭제/변경된 예약 행만 갱신"""
+        for entry in delta['removed']:
+            iid = self.row_id(entry)
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+                idx = bisect.bisect_left(self.row_order, (entry['start'], iid))
+                if idx < len(self.row_order) and self.row_order[idx][1] == iid:
+                    del self.row_order[idx]
+        for entry in delta['changed']:
+            iid = self.row_id(entry)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self.row_values(entry))
+        for entry in delta['added']:
+            iid = self.row_id(entry)
+            if self.tree.exists(iid):
+                continue
+            idx = bisect.bisect_left(self.row_order, (entry['start'], iid))
             tags = ('EvenRow',) if idx % 2 == 0 else ('OddRow',)
-            time_str = f"{entry['start'].strftime('%Y.%m.%d %H:%M')} ~ {entry['end'].strftime('%H:%M')}"
-            self.tree.insert('', 'end', values=(
-                entry['source'], entry['building'], entry['room'], time_str,
-                entry['person'], entry['status']
-            ), tags=tags)
-
-    def check_conflicts(self):
-        time_dict = {}
-        conflicts = set()
-        for entry in self.website_data + self.manual_data:
-            room_key = tuple(entry['room']) if isinstance(entry['room'], list) else (entry['room'],)
-            key = (entry['building'], room_key)
-            time_dict.setdefault(key, []).append(entry)
-        for key, entries in time_dict.items():
-            entries.sort(key=lambda x: x['start'])
-            for i in range(len(entries) - 1):
-                if entries[i]['end'] > entries[i+1]['start']:
-                    entries[i]['conflict'] = True
-                    entries[i+1]['conflict'] = True
-                    conflicts.update((id(entries[i]), id(entries[i+1])))
-        return conflicts
+            self.tree.insert('', idx, iid=iid, values=self.row_values(entry), tags=tags)
+            self.row_order.insert(idx, (entry['start'], iid))
+        if self.search_var.get():
+            self.update_search()
+
+    def check_conflicts(self, only=None):
+        return self.engine.check_conflicts(only)
+
+    # ========= 엔진 위임 ==========
+    def parse_room_number(self, room_str, building=None):
+        return parse_room_number(room_str, building)
+
+    def is_time_overlap(self, start1, end1, start2, end2):
+        return is_time_overlap(start1, end1, start2, end2)
+
+    def is_conflict(self, new_entry):
+        return self.engine.is_conflict(new_entry)
+
+    def check_availability_batch(self, queries):
+        return self.engine.check_availability_batch(queries)
+
+    def find_free_rooms(self, building, start, end):
+        return self.engine.find_free_rooms(building, start, end)
+
+    def room_free_slots(self, building, room, start, end, min_minutes=0):
+        return self.engine.room_free_slots(building, room, start, end, min_minutes)
+
+    def find_earliest_rooms(self, minutes, start, end, buildings=None, prefer=(), prefixes=(),
+                            limit=10, day_hours=(9, 22)):
+        return self.engine.find_earliest_rooms(minutes, start, end, buildings, prefer, prefixes, limit, day_hours)
+
+    def check_recurring(self, building, room, weekdays, start_time, end_time, first_day, last_day, every=1):
+        return self.engine.check_recurring(building, room, weekdays, start_time, end_time, first_day, last_day, every)
+
+    def build_heatmap(self, first_day, last_day):
+        return self.engine.build_heatmap(first_day, last_day)
+
+    def audit_campus(self, workers=None):
+        return self.engine.audit_campus(workers)
+
+    def fetch_many_buildings(self, missing):
+        """엔진이 캐시에 없는 건물을 요청할 때: 전체 건물 조회와 같은 방식으로 동시 조회"""
+        return asyncio.run(scrape_all_buildings(
+            missing,
+            concurrency=self.scrape_concurrency,
+            timeout=self.scrape_timeout,
+            form_state=self.form_state,
+            rate_limiter=self.rate_limiter
+        ))
 
     def update_search(self):
         query = self.search_var.get().lower()
@@ -633,15 +741,15 @@ class ClassroomReservationSystem:
         dialog = tk.Toplevel(self.root)
         dialog.title("🕒 사용 가능 시간 확인")
         dialog.configure(bg='#fff5f9')
-        dialog.geometry("400x250")
+        dialog.geometry("700x290")
         dialog.resizable(False, False)
         
         main_win_x = self.root.winfo_x()
         main_win_y = self.root.winfo_y()
         main_win_width = self.root.winfo_width()
         main_win_height = self.root.winfo_height()
-        dialog_width = 400
-        dialog_height = 250
+        dialog_width = 700
+        dialog_height = 290
         x = main_win_x + (main_win_width // 2) - (dialog_width // 2)
         y = main_win_y + (main_win_height // 2) - (dialog_height // 2)
         dialog.geometry(f"+{x}+{y}")
@@ -668,6 +776,11 @@ class ClassroomReservationSystem:
         entries['building'] = building_cb
         row += 1
 
+        all_buildings_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="전체 건물 (빈 강의실 찾기)", variable=all_buildings_var).grid(
+            row=row, column=1, padx=5, pady=0, sticky='w')
+        row += 1
+
         ttk.Label(main_frame, text="강의실").grid(row=row, column=0, padx=5, pady=3, sticky='w')
         room_entry = ttk.Entry(main_frame)
         room_entry.grid(row=row, column=1, padx=5, pady=3, sticky='ew')
@@ -718,6 +831,161 @@ class ClassroomReservationSystem:
                                 width=120, height=36)
         check_btn.pack(side=tk.LEFT, padx=5)
 
+        def find_free():
+            building = None if all_buildings_var.get() else building_cb.get()
+            self.show_free_rooms(dialog, building, date_entry.get(), start_hour.get(), start_min.get(),
+                                 end_hour.get(), end_min.get())
+
+        free_btn = RoundedButton(btn_frame, text="빈 강의실 찾기",
+                               command=find_free,
+                               width=120, height=36)
+        free_btn.pack(side=tk.LEFT, padx=5)
+
+        def week_slots():
+            if not room_entry.get().strip():
+                messagebox.showwarning("입력 누락", "강의실 번호를 입력해주세요!", parent=dialog)
+                return
+            self.show_week_slots(dialog, building_cb.get(), room_entry.get(), date_entry.get(),
+                                 start_hour.get(), start_min.get(), end_hour.get(), end_min.get())
+
+        week_btn = RoundedButton(btn_frame, text="주간 빈 시간",
+                               command=week_slots,
+                               width=100, height=36)
+        week_btn.pack(side=tk.LEFT, padx=5)
+
+        def earliest():
+            self.show_earliest_rooms(dialog, building_cb.get(), room_entry.get(), date_entry.get(),
+                                     start_hour.get(), start_min.get(), end_hour.get(), end_min.get(),
+                                     all_buildings_var.get())
+
+        earliest_btn = RoundedButton(btn_frame, text="가장 빠른 빈 곳",
+                                   command=earliest,
+                                   width=120, height=36)
+        earliest_btn.pack(side=tk.LEFT, padx=5)
+
+        def add_manual():
+            if not room_entry.get().strip():
+                messagebox.showwarning("입력 누락", "강의실 번호를 입력해주세요!", parent=dialog)
+                return
+            self.add_manual_reservation(dialog, building_cb.get(), room_entry.get(), date_entry.get(),
+                                        start_hour.get(), start_min.get(), end_hour.get(), end_min.get())
+
+        manual_btn = RoundedButton(btn_frame, text="수동 예약 추가",
+                                 command=add_manual,
+                                 width=110, height=36)
+        manual_btn.pack(side=tk.LEFT, padx=5)
+
+    def add_manual_reservation(self, dialog, building, room, date, sh, sm, eh, em):
+        """대화상자 입력을 수동 예약으로 추가 (겹치는 항목이 있으면 확인 후 추가)"""
+        try:
+            parsed_room = self.parse_room_number(room)
+            room_str = parsed_room[0] if parsed_room else "미지정"
+            if not re.match(r'^\d+$', room_str):
+                raise ValueError("강의실 번호가 유효하지 않습니다")
+            start_dt = self.parse_time(f"{date} {sh}:{sm}")
+            end_dt = self.parse_time(f"{date} {eh}:{em}")
+            if start_dt >= end_dt:
+                raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
+            entry = {'building': building, 'room': room_str, 'start': start_dt, 'end': end_dt}
+            conflict = self.is_conflict(entry)
+            if conflict and not messagebox.askyesno(
+                    "중복 확인",
+                    f"{conflict['source']} 항목과 겹칩니다 "
+                    f"({conflict['start'].strftime('%m/%d %H:%M')}~{conflict['end'].strftime('%H:%M')}).\n"
+                    "그래도 추가할까요?",
+                    parent=dialog):
+                return
+            self.add_manual_entry(entry)
+            messagebox.showinfo("추가 완료", f"🖋️ {building} {room_str} 수동 예약을 추가했습니다.", parent=dialog)
+        except ValueError as ve:
+            messagebox.showerror("입력 오류", str(ve), parent=dialog)
+        except Exception as e:
+            messagebox.showerror("시스템 오류", f"오류 발생: {str(e)}", parent=dialog)
+
+    def show_earliest_rooms(self, dialog, building, room, date, sh, sm, eh, em, all_buildings, days=7):
+        """선택한 시작~종료 시간 길이만큼 비는 가장 이른 강의실 (선택 건물 우선)
+
+        강의실 칸에 'PC룸'처럼 입력하면 그 이름으로 시작하는 강의실만 찾는다.
+        """
+        try:
+            start_dt = self.parse_time(f"{date} {sh}:{sm}")
+            end_dt = self.parse_time(f"{date} {eh}:{em}")
+            if start_dt >= end_dt:
+                raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
+            minutes = int((end_dt - start_dt).total_seconds() // 60)
+            prefixes = [room.strip()] if room.strip() else []
+            found = self.engine.find_earliest_rooms(
+                minutes, start_dt, start_dt.replace(hour=0, minute=0) + timedelta(days=days),
+                buildings=None if all_buildings else [building], prefer=[building], prefixes=prefixes)
+            lines = [f"{i}. {when.strftime('%m/%d %H:%M')}  {b} {r}" for i, (when, b, r) in enumerate(found, 1)]
+            messagebox.showinfo(
+                "가장 빠른 빈 강의실",
+                f"⏱️ {minutes}분 연속 사용 가능 ({start_dt.strftime('%m/%d %H:%M')} 이후 {days}일)\n\n"
+                + ('\n'.join(lines) if lines else "조건에 맞는 강의실이 없습니다."),
+                parent=dialog
+            )
+        except ValueError as ve:
+            messagebox.showerror("입력 오류", str(ve), parent=dialog)
+        except Exception as e:
+            messagebox.showerror("시스템 오류", f"오류 발생: {str(e)}", parent=dialog)
+
+    def show_week_slots(self, dialog, building, room, date, sh, sm, eh, em, days=7, min_minutes=30):
+        """선택 날짜부터 days일 동안, 매일 시작~종료 시간 안의 빈 구간(min_minutes 이상)"""
+        try:
+            first = self.parse_time(f"{date} {sh}:{sm}")
+            last = self.parse_time(f"{date} {eh}:{em}")
+            if first >= last:
+                raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
+            week_end = last + timedelta(days=days - 1)
+            slots = self.engine.room_free_slots(building, room, first, week_end, min_minutes)
+            by_day = {}
+            for start, end in slots:
+                # 일별 시간대로 자름
+                day = start.date()
+                while day <= end.date():
+                    lo = max(start, datetime.combine(day, first.time()))
+                    hi = min(end, datetime.combine(day, last.time()))
+                    if hi - lo >= timedelta(minutes=min_minutes):
+                        by_day.setdefault(day, []).append(f"{lo.strftime('%H:%M')}~{hi.strftime('%H:%M')}")
+                    day += timedelta(days=1)
+            weekdays = "월화수목금토일"
+            lines = [f"• {day.strftime('%m/%d')}({weekdays[day.weekday()]}) {', '.join(ranges)}"
+                     for day, ranges in sorted(by_day.items())]
+            messagebox.showinfo(
+                "주간 빈 시간",
+                f"🗓️ {building} {room} ({sh}:{sm}~{eh}:{em}, {min_minutes}분 이상)\n\n"
+                + ('\n'.join(lines) if lines else "빈 시간이 없습니다."),
+                parent=dialog
+            )
+        except ValueError as ve:
+            messagebox.showerror("입력 오류", str(ve), parent=dialog)
+        except Exception as e:
+            messagebox.showerror("시스템 오류", f"오류 발생: {str(e)}", parent=dialog)
+
+    def show_free_rooms(self, dialog, building, date, sh, sm, eh, em):
+        try:
+            start_dt = self.parse_time(f"{date} {sh}:{sm}")
+            end_dt = self.parse_time(f"{date} {eh}:{em}")
+            if start_dt >= end_dt:
+                raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
+            rooms, failed = self.engine.find_free_rooms(building, start_dt, end_dt)
+            by_building = {}
+            for b, room in rooms:
+                by_building.setdefault(b, []).append(room)
+            lines = [f"• {b}: {', '.join(r)}" for b, r in by_building.items()]
+            if failed:
+                lines.append("\n⚠️ 예약 조회 실패(강의만 반영): " + ', '.join(self.get_building_name(c) for c in failed))
+            messagebox.showinfo(
+                "빈 강의실",
+                f"🔎 {start_dt.strftime('%m/%d %H:%M')}~{end_dt.strftime('%H:%M')} 사용 가능 강의실 {len(rooms)}곳\n\n"
+                + ('\n'.join(lines) if lines else "조건에 맞는 강의실이 없습니다."),
+                parent=dialog
+            )
+        except ValueError as ve:
+            messagebox.showerror("입력 오류", str(ve), parent=dialog)
+        except Exception as e:
+            messagebox.showerror("시스템 오류", f"오류 발생: {str(e)}", parent=dialog)
+
     def check_availability(self, dialog, building, room, date, sh, sm, eh, em):
         try:
             parsed_room = self.parse_room_number(room)
@@ -729,29 +997,18 @@ class ClassroomReservationSystem:
             if not code:
                 raise ValueError("유효하지 않은 건물 선택입니다")
                 
-            reference_date = datetime.strptime(date, "%Y-%m-%d")
-            self.load_xml_data(reference_date=reference_date)
-            self.website_data = self.scrape_website_data(code)
-            start_time_str = f"{date} {sh}:{sm}"
-            end_time_str = f"{date} {eh}:{em}"
-            start_dt = self.parse_time(start_time_str)
-            end_dt = self.parse_time(end_time_str)
-            
-            parsed_room = self.parse_room_number(room, building)
-            if isinstance(parsed_room, list):
-                parsed_room = parsed_room[0] if parsed_room else "미지정"
-
+            try:
+                # 화면에 표시 중인 건물(website_data)은 그대로 두고 예약 캐시만 채움
+                self.scrape_website_data(code, fail_fast=False)
+            except Exception:
+                raise ValueError("KUTIS 서버 응답이 없어 예약 현황을 확인할 수 없습니다. 잠시 후 다시 시도해주세요.")
+            start_dt = self.parse_time(f"{date} {sh}:{sm}")
+            end_dt = self.parse_time(f"{date} {eh}:{em}")
             if start_dt >= end_dt:
                 raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
 
-            check_entry = {
-                'building': building,
-                'room': room_str,
-                'start': start_dt,
-                'end': end_dt
-            }
-
-            conflict_info = self.is_conflict(check_entry)
+            result = self.engine.check_availability_batch([(building, room_str, start_dt, end_dt)])[0]
+            conflict_info = result['conflict']
             if conflict_info:
                 conflict_source = conflict_info['source']
                 conflict_name = conflict_info.get('name', '')
@@ -841,6 +1098,8 @@ if __name__ == "__main__":
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     def on_closing():
+        app.poller.stop()
+        app.db.close()
         root.destroy()
     root.protocol("WM_DELETE_WINDOW", on_closing)
     root.mainloop()
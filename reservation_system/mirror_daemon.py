@@ -0,0 +1,97 @@
+"""전체 건물 예약 + 강의 XML 미러 데몬
+
+KUTIS와 강의 XML을 한 프로세스가 주기적으로 가져와 로컬 파일(JSON)에 저장한다.
+GUI는 KUTIS_MIRROR 환경 변수(또는 mirror_path)로 이 파일을 가리키면
+업스트림 대신 미러를 먼저 읽는다.
+
+    python mirror_daemon.py --store mirror.json --interval 60
+
+--db를 주면 조회 결과를 SQLite(sqlite_store.py)에도 누적해 이력 분석에 쓸 수 있다.
+"""
+import time
+import random
+import asyncio
+import argparse
+import warnings
+import requests
+from kutis import KUTIS_URL, KutisClient, parse_building_list, scrape_all_buildings
+from mirror_store import MirrorStore, entry_to_json
+from sqlite_store import ReservationDB
+
+warnings.filterwarnings('ignore', category=requests.packages.urllib3.exceptions.InsecureRequestWarning)
+
+XML_URL = "https://raw.githubusercontent.com/Nyxthorn/work/main/data.xml"
+
+
+# 미러링
+def mirror_once(store, url=KUTIS_URL, xml_url=XML_URL, concurrency=8, timeout=10, xml_interval=3600, db=None):
+    """건물 목록 → 전체 건물 예약 → (필요하면) 강의 XML 순으로 갱신. 실패한 건물은 이전 값 유지"""
+    data = store.load() or {}
+    data = dict(data, reservations=dict(data.get('reservations', {})))
+    client = KutisClient(url, timeout=timeout)
+    buildings = parse_building_list(client.fetch_form_page())
+    if buildings:
+        data['buildings'] = buildings
+    buildings = [tuple(b) for b in data.get('buildings', [])]
+
+    results, errors = asyncio.run(scrape_all_buildings(
+        buildings, concurrency=concurrency, timeout=timeout, url=url, form_state=client.form_state))
+    now = time.time()
+    for code, entries in results.items():
+        data['reservations'][code] = {'fetched_at': now, 'entries': [entry_to_json(e) for e in entries]}
+    if db is not None:
+        db.upsert_buildings(buildings)
+        db.upsert_reservations([e for entries in results.values() for e in entries], now=now)
+
+    if now - data.get('lectures_fetched_at', 0) >= xml_interval:
+        try:
+            res = requests.get(xml_url, verify=False, timeout=timeout)
+            res.raise_for_status()
+            data['lectures_xml'] = res.content.decode('utf-8')
+            data['lectures_fetched_at'] = now
+        except requests.exceptions.RequestException as e:
+            print(f"[LOG][mirror_once] 강의 XML 실패: {e}")
+
+    data['updated_at'] = now
+    store.save(data)
+    if db is not None and data.get('lectures_fetched_at') == now:
+        from engine import parse_lectures_xml
+        from recurrence import WeeklyLectures
+        try:
+            lectures, room_labels = parse_lectures_xml(data['lectures_xml'].encode('utf-8'))
+            db.replace_lectures(WeeklyLectures(lectures), room_labels, fetched_at=now)
+        except Exception as e:
+            print(f"[LOG][mirror_once] 강의 DB 갱신 실패: {e}")
+    print(f"[LOG][mirror_once] 건물 {len(results)}/{len(buildings)}개 갱신, 실패 {len(errors)}개")
+    return results, errors
+
+def run(store, interval=60, jitter=0.2, **kwargs):
+    while True:
+        try:
+            mirror_once(store, **kwargs)
+        except Exception as e:
+            print(f"[LOG][mirror_daemon] 갱신 실패: {e}")
+        time.sleep(interval * random.uniform(1 - jitter, 1 + jitter))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KUTIS 예약/강의 미러 데몬")
+    parser.add_argument('--store', default='mirror.json')
+    parser.add_argument('--url', default=KUTIS_URL)
+    parser.add_argument('--xml-url', default=XML_URL)
+    parser.add_argument('--interval', type=float, default=60, help="예약 갱신 주기(초)")
+    parser.add_argument('--xml-interval', type=float, default=3600, help="강의 XML 갱신 주기(초)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--db', help="조회 결과를 누적할 SQLite 파일")
+    parser.add_argument('--once', action='store_true', help="한 번만 갱신하고 종료")
+    args = parser.parse_args()
+
+    store = MirrorStore(args.store)
+    options = dict(url=args.url, xml_url=args.xml_url, concurrency=args.concurrency,
+                   timeout=args.timeout, xml_interval=args.xml_interval,
+                   db=ReservationDB(args.db) if args.db else None)
+    if args.once:
+        mirror_once(store, **options)
+    else:
+        run(store, interval=args.interval, **options)
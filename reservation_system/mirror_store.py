@@ -0,0 +1,78 @@
+"""미러 데몬(mirror_daemon.py)이 쓰는 로컬 JSON 저장소
+
+GUI, CLI, 서비스가 네트워크 라이브러리 없이 읽을 수 있도록 데몬과 분리해 둔다.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+TIME_FIELDS = ('start', 'end')
+
+
+def entry_to_json(entry):
+    return {k: (v.isoformat() if k in TIME_FIELDS else v) for k, v in entry.items()}
+
+def entry_from_json(data):
+    return {k: (datetime.fromisoformat(v) if k in TIME_FIELDS else v) for k, v in data.items()}
+
+
+# 로컬 저장소
+class MirrorStore:
+    """미러 JSON 파일. 파일이 바뀐 경우에만 다시 읽는다"""
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return None
+            if mtime != self._mtime:
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        self._data = json.load(f)
+                    self._mtime = mtime
+                except (OSError, ValueError) as e:
+                    print(f"[LOG][MirrorStore] 읽기 실패: {e}")
+                    return self._data
+            return self._data
+
+    def save(self, data):
+        """임시 파일에 쓴 뒤 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def buildings(self):
+        data = self.load()
+        return [tuple(b) for b in data.get('buildings', [])] if data else []
+
+    def reservations(self, code, max_age=None):
+        """건물 예약 목록. 없거나 max_age(초)보다 오래되면 None"""
+        data = self.load()
+        item = (data or {}).get('reservations', {}).get(code)
+        if not item or (max_age is not None and time.time() - item['fetched_at'] > max_age):
+            return None
+        return [entry_from_json(e) for e in item['entries']]
+
+    def lectures_xml(self, max_age=None):
+        data = self.load()
+        if not data or not data.get('lectures_xml'):
+            return None
+        if max_age is not None and time.time() - data.get('lectures_fetched_at', 0) > max_age:
+            return None
+        return data['lectures_xml'].encode('utf-8')
+
+    def age(self):
+        """마지막 갱신 후 지난 초 (미러가 없으면 None)"""
+        data = self.load()
+        if not data or 'updated_at' not in data:
+            return None
+        return time.time() - data['updated_at']
@@ -0,0 +1,196 @@
+import heapq
+from datetime import datetime, timedelta
+from room_index import canonical_building, room_keys
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES     # 288
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+
+def slot_mask(first, last):
+    """[first, last) 슬롯 비트마스크"""
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+def day_pieces(start, end):
+    """구간을 날짜별 (날짜, 시작 슬롯, 끝 슬롯)으로 나눔. 점유는 바깥쪽으로 반올림"""
+    day = start.date()
+    while True:
+        day_start = datetime.combine(day, datetime.min.time())
+        lo = max(start, day_start)
+        hi = min(end, day_start + timedelta(days=1))
+        if lo >= hi:
+            break
+        first = int((lo - day_start).total_seconds() // (SLOT_MINUTES * 60))
+        last = -int(-(hi - day_start).total_seconds() // (SLOT_MINUTES * 60))
+        yield day, first, min(last, SLOTS_PER_DAY)
+        if hi >= end:
+            break
+        day += timedelta(days=1)
+
+def bit_runs(mask):
+    """켜진 비트 구간 [시작, 끝)을 낮은 비트부터 반환"""
+    pos = 0
+    while mask:
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        pos += skip
+        length = (~mask & (mask + 1)).bit_length() - 1
+        yield pos, pos + length
+        mask >>= length
+        pos += length
+
+
+# 5분 단위 점유 비트맵
+class OccupancyGrid:
+    """(건물, 호수, 날짜)별 288비트(5분 슬롯) 점유 마스크
+
+    강의/웹/수동 항목을 OR로 합쳐 두면, "이 구간이 비었나"는 AND 한 번,
+    빈 시간 목록은 비트 스캔으로 구한다.
+    """
+    def __init__(self, *sources):
+        self._masks = {}
+        self._rooms = {}        # 건물 → 항목이 있었던 호수 집합 (빈 강의실 후보)
+        for entries in sources:
+            self.add_many(entries)
+
+    def add(self, entry):
+        for building, room in room_keys(entry):
+            self._rooms.setdefault(building, set()).add(room)
+            for day, first, last in day_pieces(entry['start'], entry['end']):
+                key = (building, room, day)
+                self._masks[key] = self._masks.get(key, 0) | slot_mask(first, last)
+
+    def add_many(self, entries):
+        for entry in entries:
+            self.add(entry)
+
+    def set_day(self, building, room, day, entries):
+        """한 강의실-날짜 마스크를 entries로 다시 계산 (삭제 반영용)"""
+        key = (canonical_building(building), room, day)
+        mask = 0
+        for entry in entries:
+            for d, first, last in day_pieces(entry['start'], entry['end']):
+                if d == day:
+                    mask |= slot_mask(first, last)
+        if mask:
+            self._masks[key] = mask
+        else:
+            self._masks.pop(key, None)
+
+    def rooms(self, building=None):
+        """항목이 한 번이라도 있었던 (건물, 호수) 목록"""
+        if building:
+            building = canonical_building(building)
+            return sorted((building, room) for room in self._rooms.get(building, ()))
+        return sorted((b, room) for b, rooms in self._rooms.items() for room in rooms)
+
+    def busy_mask(self, building, room, day):
+        return self._masks.get((canonical_building(building), room, day), 0)
+
+    def is_free(self, building, room, start, end):
+        building = canonical_building(building)
+        for day, first, last in day_pieces(start, end):
+            if self._masks.get((building, room, day), 0) & slot_mask(first, last):
+                return False
+        return True
+
+    def free_rooms(self, start, end, building=None):
+        """[start, end) 내내 비어 있는 (건물, 호수) 목록 (building=None이면 전체 건물)
+
+        구간을 날짜별 마스크로 한 번 바꿔 두고 강의실마다 AND만 한다.
+        """
+        pieces = [(day, slot_mask(first, last)) for day, first, last in day_pieces(start, end)]
+        masks = self._masks
+        return [
+            (b, room) for b, room in self.rooms(building)
+            if not any(masks.get((b, room, day), 0) & mask for day, mask in pieces)
+        ]
+
+    def free_slots(self, building, room, day, min_minutes=0, day_start=0, day_end=SLOTS_PER_DAY):
+        """해당 날짜의 빈 구간 [(시작, 끝)] (min_minutes 미만 구간 제외)"""
+        base = datetime.combine(day, datetime.min.time())
+        free = ~self.busy_mask(building, room, day) & slot_mask(day_start, day_end)
+        min_slots = -(-min_minutes // SLOT_MINUTES)
+        return [
+            (base + timedelta(minutes=first * SLOT_MINUTES), base + timedelta(minutes=last * SLOT_MINUTES))
+            for first, last in bit_runs(free) if last - first >= max(min_slots, 1)
+        ]
+
+    def free_intervals(self, building, room, start, end, min_minutes=0):
+        """[start, end) 중 빈 구간 [(시작, 끝)] (주간 보기용)
+
+        날짜별 마스크의 여집합을 비트 스캔하고, 자정에서 이어지는 빈 구간은 하나로 합친다.
+        경계는 안쪽 5분 단위로 맞춘다.
+        """
+        building = canonical_building(building)
+        step = timedelta(minutes=SLOT_MINUTES)
+        result = []
+        day = start.date()
+        while True:
+            base = datetime.combine(day, datetime.min.time())
+            if base >= end:
+                break
+            first = max(0, -int(-(start - base).total_seconds() // (SLOT_MINUTES * 60)))
+            last = min(SLOTS_PER_DAY, int((end - base).total_seconds() // (SLOT_MINUTES * 60)))
+            free = ~self._masks.get((building, room, day), 0) & slot_mask(first, last)
+            for lo, hi in bit_runs(free):
+                if result and result[-1][1] == base + lo * step:
+                    result[-1] = (result[-1][0], base + hi * step)
+                else:
+                    result.append((base + lo * step, base + hi * step))
+            day += timedelta(days=1)
+        min_length = timedelta(minutes=max(min_minutes, 0))
+        return [(s, e) for s, e in result if e - s >= min_length]
+
+    def first_fit(self, building, room, day, slots, first=0, last=SLOTS_PER_DAY):
+        """day의 [first, last) 슬롯 안에서 slots개 연속으로 빈 첫 시작 슬롯 (없으면 None)"""
+        free = ~self._masks.get((canonical_building(building), room, day), 0) & slot_mask(first, last)
+        for lo, hi in bit_runs(free):
+            if hi - lo >= slots:
+                return lo
+        return None
+
+    def earliest_fit(self, rooms, minutes, start, end, prefer=(), limit=10, day_start=0, day_end=SLOTS_PER_DAY):
+        """[start, end) 안에서 minutes분 연속으로 빈 (시작 시각, 건물, 호수)를 이른 순으로 limit개
+
+        강의실마다 "아직 확인 안 한 날"을 그날 가능한 가장 이른 시각(하한)으로 힙에 넣고,
+        꺼낼 때 그날 비트맵을 확인해 실제 시작 시각으로 다시 넣는다. 확인된 후보가 힙 맨 앞에
+        오면 그보다 이른 후보는 없으므로 확정한다. 같은 시각이면 prefer 순서의 건물이 먼저다.
+        """
+        slots = -(-minutes // SLOT_MINUTES)
+        if slots <= 0 or slots > day_end - day_start:
+            return []
+        rank = {canonical_building(b): i for i, b in enumerate(prefer)}
+        step = timedelta(minutes=SLOT_MINUTES)
+
+        def bound(day):
+            base = datetime.combine(day, datetime.min.time())
+            lo = max(start, base + day_start * step)
+            first = -int(-(lo - base).total_seconds() // (SLOT_MINUTES * 60))
+            last = min(day_end, int((end - base).total_seconds() // (SLOT_MINUTES * 60)))
+            return base, first, last
+
+        heap = []
+        for building, room in rooms:
+            base, first, _ = bound(start.date())
+            heapq.heappush(heap, (base + first * step, rank.get(building, len(rank)), building, room, False))
+        found = []
+        while heap and len(found) < limit:
+            when, order, building, room, checked = heapq.heappop(heap)
+            if checked:
+                found.append((when, building, room))
+                continue
+            day = when.date()
+            base, first, last = bound(day)
+            if base >= end:
+                continue
+            slot = self.first_fit(building, room, day, slots, first, last) if last - first >= slots else None
+            if slot is not None:
+                heapq.heappush(heap, (base + slot * step, order, building, room, True))
+            else:
+                next_base, next_first, _ = bound(day + timedelta(days=1))
+                if next_base < end:
+                    heapq.heappush(heap, (next_base + next_first * step, order, building, room, False))
+        return found
@@ -0,0 +1,146 @@
+import time
+import heapq
+import random
+import threading
+from room_index import reservation_key
+
+
+def reservation_snapshot(entries):
+    """변경 여부 비교용 (키, 상태) 집합"""
+    return frozenset((reservation_key(e), e.get('status')) for e in entries)
+
+
+# 전역 요청 속도 제한
+class RateLimiter:
+    """토큰 버킷. 초당 rate개, 최대 burst개까지 몰아서 허용"""
+    def __init__(self, rate=0.5, burst=2):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """토큰을 얻을 때까지 대기 (stop_event가 set되면 False)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+# 백그라운드 폴링
+class PollingScheduler:
+    """현재 건물과 관심 건물을 주기적으로 다시 조회
+
+    refresh(code)는 변경이 있었으면 True를 반환한다. 변경이 없으면 다음 주기를
+    backoff배씩 max_interval까지 늘리고, 변경이 생기면 interval로 되돌린다.
+    매 주기는 ±jitter 비율로 흔들어 여러 클라이언트의 요청이 몰리지 않게 한다.
+    rate_limiter=None이면 여기서는 제한하지 않는다 (KutisClient가 요청마다 제한할 때).
+    """
+    def __init__(self, refresh, interval=60, max_interval=600, backoff=2.0, jitter=0.2, rate_limiter=None):
+        self.refresh = refresh
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rate_limiter = rate_limiter
+        self.current = None
+        self.watched = set()
+        self._intervals = {}    # 코드 → 현재 주기
+        self._due = {}          # 코드 → 유효한 예정 시각
+        self._heap = []         # (예정 시각, 코드), 오래된 항목은 꺼낼 때 버림
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_current(self, code):
+        with self._lock:
+            self.current = code
+        self._schedule(code, self.interval)
+
+    def watch(self, code):
+        with self._lock:
+            self.watched.add(code)
+        self._schedule(code, self.interval)
+
+    def unwatch(self, code):
+        with self._lock:
+            self.watched.discard(code)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _targets(self):
+        with self._lock:
+            return self.watched | ({self.current} if self.current else set())
+
+    def _schedule(self, code, interval):
+        if code is None:
+            return
+        delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        due = time.monotonic() + delay
+        with self._lock:
+            self._intervals[code] = interval
+            self._due[code] = due
+            heapq.heappush(self._heap, (due, code))
+        self._wakeup.set()
+
+    def _next_due(self):
+        """대상에서 빠졌거나 다시 예약된 항목을 버리고 가장 이른 예정 반환"""
+        with self._lock:
+            targets = self.watched | ({self.current} if self.current else set())
+            while self._heap:
+                due, code = self._heap[0]
+                if code in targets and self._due.get(code) == due:
+                    return due, code
+                heapq.heappop(self._heap)
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            nxt = self._next_due()
+            if nxt is None:
+                self._wakeup.wait()
+                continue
+            due, code = nxt
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._wakeup.wait(wait)
+                continue
+            with self._lock:
+                # 대기 중 다른 예약이 끼어들었으면 다시 고름
+                if not self._heap or self._heap[0] != (due, code):
+                    continue
+                heapq.heappop(self._heap)
+                self._due.pop(code, None)
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(self._stop):
+                break
+            try:
+                changed = self.refresh(code)
+            except Exception as e:
+                print(f"[LOG][PollingScheduler] {code}: {e}")
+                changed = False
+            if code not in self._targets():
+                continue
+            interval = self.interval if changed else min(self._intervals.get(code, self.interval) * self.backoff, self.max_interval)
+            self._schedule(code, interval)
@@ -0,0 +1,151 @@
+"""매주 반복 예약 (요일 시간표)
+
+강의는 날짜 대신 (건물, 호수) → 요일 → 시각으로 보관해 학기 전체 질의에 그대로 쓰고,
+반복 예약은 회차를 펼친 뒤 웹/수동 예약 인덱스를 한 번 훑어 충돌을 찾는다.
+"""
+from datetime import datetime, timedelta
+from room_index import RoomIndex, canonical_building, room_keys, room_numbers
+
+WEEKDAY_CODES = {'월': 0, '화': 1, '수': 2, '목': 3, '금': 4, '토': 5, '일': 6}
+
+
+def parse_weekdays(text):
+    """'월수' / '월,수' / [0, 2] / ['월', '2'] → 요일 번호 목록 (월=0)"""
+    if isinstance(text, (list, tuple, set)):
+        days = set()
+        for d in text:
+            if isinstance(d, str) and d.strip() in WEEKDAY_CODES:
+                days.add(WEEKDAY_CODES[d.strip()])
+                continue
+            try:
+                day = int(d)
+            except (TypeError, ValueError):
+                raise ValueError(f"잘못된 요일: {d}") from None
+            if not 0 <= day <= 6:
+                raise ValueError(f"잘못된 요일: {d}")
+            days.add(day)
+        if not days:
+            raise ValueError(f"잘못된 요일: {text}")
+        return sorted(days)
+    days = sorted({WEEKDAY_CODES[ch] for ch in str(text) if ch in WEEKDAY_CODES})
+    if not days:
+        raise ValueError(f"잘못된 요일: {text}")
+    return days
+
+
+def weekly_occurrences(weekdays, start_time, end_time, first_day, last_day, every=1):
+    """first_day~last_day 사이 매주(every주 간격) 해당 요일의 (시작, 끝)을 시간 순으로"""
+    if end_time <= start_time:
+        raise ValueError("종료 시간이 시작 시간보다 빠릅니다.")
+    if every < 1:
+        raise ValueError(f"반복 간격은 1주 이상이어야 합니다: {every}")
+    weekdays = parse_weekdays(weekdays)
+    week_start = first_day - timedelta(days=first_day.weekday())
+    while week_start <= last_day:
+        for weekday in weekdays:
+            day = week_start + timedelta(days=weekday)
+            if first_day <= day <= last_day:
+                yield datetime.combine(day, start_time), datetime.combine(day, end_time)
+        week_start += timedelta(weeks=every)
+
+
+# 요일별 강의 시간표
+class WeeklyLectures:
+    """(건물, 호수) → 요일 → [(시작 분, 끝 분, 강의명)]
+
+    parse_time_code로 펼친 ±6일 강의 목록에는 모든 요일이 들어 있으므로, 날짜를 떼고
+    요일/시각만 남기면 학기 내내 반복되는 시간표가 된다.
+    """
+    def __init__(self, lectures=()):
+        self._slots = {}
+        seen = set()
+        for entry in lectures:
+            start = entry['start']
+            first = start.hour * 60 + start.minute
+            slot = (start.weekday(), first, first + int((entry['end'] - start).total_seconds() // 60),
+                    entry.get('name', ''))
+            for key in room_keys(entry):
+                if (key, slot) in seen:
+                    continue
+                seen.add((key, slot))
+                self._slots.setdefault(key, {}).setdefault(slot[0], []).append(slot[1:])
+        for days in self._slots.values():
+            for slots in days.values():
+                slots.sort()
+
+    @classmethod
+    def from_items(cls, items):
+        """items() 형식 ((건물, 호수), 요일, 시작 분, 끝 분, 강의명)에서 복원 (저장소에서 읽을 때)"""
+        weekly = cls()
+        for key, weekday, start, end, name in items:
+            weekly._slots.setdefault(key, {}).setdefault(weekday, []).append((start, end, name))
+        for days in weekly._slots.values():
+            for slots in days.values():
+                slots.sort()
+        return weekly
+
+    def __bool__(self):
+        return bool(self._slots)
+
+    def buildings(self):
+        """강의가 있는 공식 건물명 집합"""
+        return {building for building, _ in self._slots}
+
+    def items(self):
+        """((건물, 호수), 요일, 시작 분, 끝 분, 강의명)을 모두 반환"""
+        for key, days in self._slots.items():
+            for weekday, slots in days.items():
+                for start, end, name in slots:
+                    yield key, weekday, start, end, name
+
+    def entries(self, first_day, last_day):
+        """first_day~last_day의 강의를 parse_lectures_xml과 같은 형식의 날짜 항목으로"""
+        day = first_day
+        while day <= last_day:
+            base = datetime.combine(day, datetime.min.time())
+            for (building, room), days in self._slots.items():
+                for s, e, name in days.get(day.weekday(), []):
+                    yield {'building': building, 'room': room, 'source': '수업', 'name': name,
+                           'start': base + timedelta(minutes=s), 'end': base + timedelta(minutes=e)}
+            day += timedelta(days=1)
+
+    def overlapping(self, building, room, start, end):
+        """[start, end)와 겹치는 강의를 날짜를 붙인 항목으로 시간 순 반환 (자정을 넘으면 날짜별로)"""
+        days = self._slots.get((canonical_building(building), room), {})
+        found = []
+        day = start.date()
+        while True:
+            base = datetime.combine(day, datetime.min.time())
+            if base >= end:
+                break
+            lo = max(0, int((start - base).total_seconds() // 60))
+            hi = -int(-(end - base).total_seconds() // 60)
+            found.extend(
+                {'source': '수업', 'name': name,
+                 'start': base + timedelta(minutes=s), 'end': base + timedelta(minutes=e)}
+                for s, e, name in days.get(day.weekday(), []) if s < hi and e > lo
+            )
+            day += timedelta(days=1)
+        return found
+
+
+def recurring_conflicts(building, room, occurrences, weekly_lectures, reservations=()):
+    """반복 예약의 회차별 충돌 [{'start', 'end', 'conflicts': [{source, name, start, end}]}]
+
+    강의는 요일 시간표에서, 웹/수동 예약은 정렬 인덱스 한 번 훑기(first_conflicts)로 찾는다.
+    충돌이 없는 회차는 결과에서 빠진다.
+    """
+    building = canonical_building(building)
+    occurrences = list(occurrences)
+    numbers = room_numbers(room, building)
+    index = RoomIndex(*reservations)
+    found = index.first_conflicts([(building, room, start, end) for start, end in occurrences])
+    result = []
+    for (start, end), entry in zip(occurrences, found):
+        conflicts = [c for number in numbers for c in weekly_lectures.overlapping(building, number, start, end)]
+        if entry is not None:
+            conflicts.append({'source': entry['source'], 'name': entry.get('name', ''),
+                              'start': entry['start'], 'end': entry['end']})
+        if conflicts:
+            result.append({'start': start, 'end': end, 'conflicts': conflicts})
+    return result
@@ -0,0 +1,219 @@
+import re
+import bisect
+from datetime import timedelta
+
+# 축약 → 공식 건물명 (강의 XML 표기)
+BUILDING_ALIASES = {
+    '1공': '제1공학관', '4공': '제4공학관', '5공': '제5공학관(제2자연관)', '건': '건강과학관(제1자연관)', '교': '교육관',
+    '경': '제1경영관(제1경상관)', '문': '문무관', '2경': '제2경영관(제2경상관)', '창': '창조관', '산': '산학협력관',
+    '디': '디자인관', '법': '법정관', '예': '예술관', '고운': '고운관(인문관)', '성훈': '성훈관(제3공학관)',
+    '국': '국제어학관(국제교육관)', '한': '한마관',
+}
+
+
+def canonical_building(name):
+    """축약/공식 건물명을 공식명으로 통일"""
+    name = str(name).strip()
+    return BUILDING_ALIASES.get(name, name)
+
+def parse_room_number(room_str, building=None):
+    """강의실 문자열에서 3~4자리 호수 추출 (산학협력관 외 '1505' → '505')"""
+    if isinstance(room_str, list):
+        room_str = ' '.join(str(x) for x in room_str)
+    parsed = []
+    for num in re.findall(r'\d{3,4}', str(room_str)):
+        if building and '산학협력관' not in building:
+            if len(num) == 4 and num.startswith('1'):
+                num = num[1:]
+        parsed.append(num)
+    return parsed if parsed else [str(room_str).strip() or "미지정"]
+
+def room_numbers(room, building=None):
+    """비교용 호수 목록 (숫자가 없는 이름은 제외)"""
+    names = room if isinstance(room, list) else [room]
+    flat = []
+    for name in names:
+        flat.extend(name if isinstance(name, list) else [name])
+    result = []
+    for num in parse_room_number(flat, building):
+        digits = re.sub(r'\D', '', str(num))
+        if digits and digits not in result:
+            result.append(digits)
+    return result
+
+def room_keys(entry):
+    """항목이 속한 (공식 건물명, 호수) 키 목록"""
+    building = canonical_building(entry['building'])
+    return [(building, room) for room in room_numbers(entry['room'], building)]
+
+def unique_lectures(entries):
+    """같은 강의실·시간·강의명으로 여러 번 나온 강의(중복 등록된 분반 등)는 하나만 남김
+
+    XML에 같은 강의가 두 번 실려 있으면 스윕이 자기 자신과의 충돌로 잡으므로,
+    인덱스에 넣기 전에 (강의실 키, 시작, 끝, 강의명)이 같은 수업 항목을 합친다.
+    """
+    seen = set()
+    result = []
+    for entry in entries:
+        if entry.get('source') == '수업':
+            key = (tuple(room_keys(entry)), entry['start'], entry['end'], entry.get('name', ''))
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(entry)
+    return result
+
+def reservation_key(entry):
+    """예약 항목의 안정 키 (출처, 건물, 강의실, 시간, 신청자)"""
+    room = entry['room']
+    room = tuple(room) if isinstance(room, list) else (room,)
+    return (entry['source'], entry['building'], room, entry['start'], entry['end'], entry.get('person', ''))
+
+def merge_reservations(old, new):
+    """이전/새 조회 결과 비교 → (병합 목록, {'added', 'removed', 'changed'})
+
+    키가 같은 항목은 이전 객체를 재사용하고(충돌 표시 유지), 상태만 바뀐 경우
+    이전 객체의 status를 갱신해 changed로 보고한다.
+    """
+    old_map = {reservation_key(e): e for e in old}
+    merged, seen = [], set()
+    delta = {'added': [], 'removed': [], 'changed': []}
+    for entry in new:
+        key = reservation_key(entry)
+        if key in seen:
+            continue
+        seen.add(key)
+        prev = old_map.get(key)
+        if prev is None:
+            delta['added'].append(entry)
+            merged.append(entry)
+            continue
+        if prev.get('status') != entry.get('status'):
+            prev['status'] = entry.get('status')
+            delta['changed'].append(prev)
+        merged.append(prev)
+    delta['removed'] = [e for key, e in old_map.items() if key not in seen]
+    return merged, delta
+
+
+# (건물, 강의실) 구간 인덱스
+class RoomIndex:
+    """(건물, 호수)별로 시작 시각 정렬 구간을 보관
+
+    겹침 조회는 해시 조회 한 번 + 이분 탐색으로, [시작 - 최장 구간, 끝) 범위의
+    후보만 확인한다.
+    """
+    def __init__(self, *sources):
+        self._starts = {}       # 키 → 시작 시각 정렬 목록
+        self._items = {}        # 키 → (시작, 끝, 항목) 목록 (_starts와 같은 순서)
+        self._longest = {}      # 키 → 최장 구간 길이
+        for entries in sources:
+            self.add_many(entries)
+
+    def __len__(self):
+        return sum(len(items) for items in self._items.values())
+
+    def keys(self):
+        return self._items.keys()
+
+    def add(self, entry):
+        for key in room_keys(entry):
+            starts = self._starts.setdefault(key, [])
+            items = self._items.setdefault(key, [])
+            idx = bisect.bisect_right(starts, entry['start'])
+            starts.insert(idx, entry['start'])
+            items.insert(idx, (entry['start'], entry['end'], entry))
+            self._longest[key] = max(self._longest.get(key, timedelta(0)), entry['end'] - entry['start'])
+
+    def add_many(self, entries):
+        touched = set()
+        for entry in entries:
+            for key in room_keys(entry):
+                self._items.setdefault(key, []).append((entry['start'], entry['end'], entry))
+                touched.add(key)
+        for key in touched:
+            items = self._items[key]
+            items.sort(key=lambda item: item[0])
+            self._starts[key] = [item[0] for item in items]
+            self._longest[key] = max(end - start for start, end, _ in items)
+
+    def remove(self, entry):
+        for key in room_keys(entry):
+            starts = self._starts.get(key, [])
+            items = self._items.get(key, [])
+            idx = bisect.bisect_left(starts, entry['start'])
+            while idx < len(items) and items[idx][0] == entry['start']:
+                if items[idx][2] is entry:
+                    del starts[idx]
+                    del items[idx]
+                    break
+                idx += 1
+
+    def intervals(self, building, room):
+        """(시작, 끝, 항목) 정렬 목록 (읽기 전용)"""
+        return self._items.get((canonical_building(building), room), [])
+
+    def overlapping(self, building, room, start, end):
+        """[start, end)와 겹치는 항목들을 시작 시각 순으로 반환"""
+        key = (canonical_building(building), room)
+        starts = self._starts.get(key)
+        if not starts:
+            return []
+        items = self._items[key]
+        lo = bisect.bisect_right(starts, start - self._longest[key])
+        hi = bisect.bisect_left(starts, end)
+        return [entry for s, e, entry in items[lo:hi] if e > start]
+
+    def first_conflict(self, building, room, start, end):
+        found = self.overlapping(building, room, start, end)
+        return found[0] if found else None
+
+    def conflict_groups(self, keys=None):
+        """강의실별 스윕: 구간이 이어서 겹치는 항목 묶음(2개 이상)을 모두 반환
+
+        인덱스가 이미 시작 시각 순이므로 키마다 한 번 훑으면 되고,
+        전체 비용은 정렬 O(n log n) + 결과 크기 O(k)이다.
+        """
+        groups = []
+        for key in (self._items.keys() if keys is None else keys):
+            group, group_end = [], None
+            for start, end, entry in self._items.get(key, []):
+                if group and start < group_end:
+                    group.append(entry)
+                    group_end = max(group_end, end)
+                    continue
+                if len(group) > 1:
+                    groups.append((key, group))
+                group, group_end = [entry], end
+            if len(group) > 1:
+                groups.append((key, group))
+        return groups
+
+    def first_conflicts(self, queries):
+        """(건물, 호수, 시작, 끝) 질의 목록 각각의 겹치는 항목(없으면 None)을 한 번에 구함
+
+        강의실별로 질의를 끝 시각 순으로 정렬하고, 시작 시각 순 항목을 한 번만 훑으며
+        "시작 < 질의 끝"인 접두부의 최대 종료 항목을 유지한다. 그 종료 시각이 질의 시작보다
+        크면 겹침이다. 비용은 O(n + q log q).
+        돌려주는 항목은 겹치는 것 중 가장 이른 것이 아니라 그 최대 종료 항목이다.
+        """
+        results = [None] * len(queries)
+        by_key = {}
+        for i, (building, room, start, end) in enumerate(queries):
+            building = canonical_building(building)
+            for number in room_numbers(room, building):
+                by_key.setdefault((building, number), []).append((end, start, i))
+        for key, pending in by_key.items():
+            items = self._items.get(key)
+            if not items:
+                continue
+            pending.sort(key=lambda q: q[0])
+            pos, best = 0, None
+            for end, start, i in pending:
+                while pos < len(items) and items[pos][0] < end:
+                    if best is None or items[pos][1] > best[1]:
+                        best = items[pos]
+                    pos += 1
+                if best is not None and best[1] > start and results[i] is None:
+                    results[i] = best[2]
+        return results
@@ -0,0 +1,188 @@
+"""강의실 사용 가능 여부 조회 CLI (JSON 출력)
+
+    python room_query.py 1공 704 --date 2026-10-21 --start 18:00 --end 20:00
+    python room_query.py --queries queries.jsonl --mirror mirror.json
+
+질의 파일은 한 줄에 JSON 하나 ('-'면 표준 입력):
+    {"building": "1공", "room": "704", "start": "2026-10-21T18:00", "end": "2026-10-21T20:00"}
+    {"building": "1공", "room": "704", "date": "2026-10-21", "start": "18:00", "end": "20:00"}
+
+미러(mirror_daemon.py 저장소)가 --max-age초 이내로 갱신돼 있으면 네트워크 없이 답한다.
+--offline이면 오래된 미러라도 네트워크를 쓰지 않는다.
+강의 XML이나 건물 예약을 읽지 못하면 결과의 lectures_checked / reservations_checked가 false다.
+표준 출력에는 JSON만 쓰고, 진행 로그는 표준 오류로 보낸다.
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+from datetime import datetime
+from engine import ReservationEngine, ReservationStore
+from mirror_store import MirrorStore
+from room_index import canonical_building, room_numbers
+
+
+def parse_query(item):
+    """JSON 질의 → (공식 건물명, 강의실, 시작, 끝)"""
+    if item.get('date'):
+        start = datetime.strptime(f"{item['date']} {item['start']}", "%Y-%m-%d %H:%M")
+        end = datetime.strptime(f"{item['date']} {item['end']}", "%Y-%m-%d %H:%M")
+    else:
+        start = datetime.fromisoformat(item['start'])
+        end = datetime.fromisoformat(item['end'])
+    if start >= end:
+        raise ValueError(f"종료 시간이 시작 시간보다 빠릅니다: {item['building']} {item['room']}")
+    building = canonical_building(item['building'])
+    if not room_numbers(str(item['room']), building):
+        raise ValueError(f"강의실 번호가 유효하지 않습니다: {item['room']}")
+    return building, str(item['room']), start, end
+
+def read_queries(path):
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [parse_query(json.loads(line)) for line in f if line.strip()]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='minutes')
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    return value
+
+
+# 데이터 출처 (미러 우선, 필요할 때만 네트워크)
+class SnapshotLoader:
+    def __init__(self, mirror=None, max_age=300, offline=False, xml_path=None, timeout=10):
+        self.mirror = mirror
+        self.offline = offline
+        self.xml_path = xml_path
+        self.timeout = timeout
+        age = mirror.age() if mirror else None
+        # 미러 전체가 신선하면 건물별 수집 시각과 무관하게 미러만 사용
+        self.warm = offline or (age is not None and age <= max_age)
+        self.max_age = None if self.warm else max_age
+        self.failed = set()
+
+    def buildings(self):
+        if self.mirror and self.mirror.buildings():
+            return self.mirror.buildings()
+        if self.offline:
+            return []
+        from kutis import KutisClient, parse_building_list
+        return parse_building_list(KutisClient(timeout=self.timeout).fetch_form_page())
+
+    def lectures_xml(self):
+        if self.xml_path:
+            with open(self.xml_path, 'rb') as f:
+                return f.read()
+        content = self.mirror.lectures_xml() if self.mirror else None
+        if content is not None or self.warm:
+            return content
+        import requests
+        from mirror_daemon import XML_URL
+        try:
+            response = requests.get(XML_URL, verify=False, timeout=self.timeout)
+            response.raise_for_status()
+            return response.content
+        except requests.exceptions.RequestException as e:
+            print(f"[LOG][room_query] 강의 XML 실패: {e}", file=sys.stderr)
+            return None
+
+    def fetch_many(self, missing):
+        """엔진의 fetch_many: 미러에서 먼저 찾고, 나머지만 KUTIS 동시 조회"""
+        results, rest = {}, []
+        for code, name in missing:
+            entries = self.mirror.reservations(code, max_age=self.max_age) if self.mirror else None
+            if entries is not None:
+                results[code] = entries
+            else:
+                rest.append((code, name))
+        errors = {}
+        if rest and self.warm:
+            errors = {code: "미러에 없음" for code, _ in rest}
+        elif rest:
+            import asyncio
+            from kutis import scrape_all_buildings
+            fetched, errors = asyncio.run(scrape_all_buildings(rest, timeout=self.timeout))
+            results.update(fetched)
+        self.failed.update(errors)
+        return results, errors
+
+
+def add_source_arguments(parser):
+    """미러/강의 XML/네트워크 옵션 (room_query, audit, analytics CLI 공통)"""
+    parser.add_argument('--mirror', default=os.environ.get("KUTIS_MIRROR"), help="미러 저장소 경로")
+    parser.add_argument('--max-age', type=float, default=300, help="이 시간(초) 이내의 미러면 네트워크 생략")
+    parser.add_argument('--offline', action='store_true', help="네트워크를 전혀 쓰지 않음")
+    parser.add_argument('--xml', help="강의 XML 파일 (없으면 미러 → 네트워크)")
+    parser.add_argument('--timeout', type=float, default=10)
+
+def loader_from_args(args):
+    return SnapshotLoader(MirrorStore(args.mirror) if args.mirror else None, max_age=args.max_age,
+                          offline=args.offline, xml_path=args.xml, timeout=args.timeout)
+
+def make_engine(loader):
+    return ReservationEngine(loader.buildings(), xml_loader=loader.lectures_xml,
+                             reservations=ReservationStore(), fetch_many=loader.fetch_many)
+
+def campus_engine(loader):
+    """전체 건물 예약과 강의를 채운 엔진 (감사/분석용). 못 읽은 건물은 loader.failed"""
+    engine = make_engine(loader)
+    engine.ensure_reservations(engine.building_codes())
+    engine.load_xml_data()
+    return engine
+
+
+def run(queries, loader):
+    engine = make_engine(loader)
+    results = engine.check_availability_batch(queries)
+    lectures_checked = engine.lectures_loaded
+    if not lectures_checked:
+        print("[LOG][room_query] 강의 XML 없음: 강의 충돌은 확인하지 않았습니다", file=sys.stderr)
+    names = {code: name for code, name in engine.buildings}
+    unchecked = {names.get(code) for code in loader.failed}
+    known = {name for _, name in engine.buildings}
+    for result in results:
+        # 예약을 못 읽은 건물(또는 목록에 없는 건물)은 강의/수동 입력만 반영된 결과
+        result['reservations_checked'] = result['building'] in known and result['building'] not in unchecked
+        result['lectures_checked'] = lectures_checked
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="강의실 사용 가능 여부 조회 (JSON 출력)")
+    parser.add_argument('building', nargs='?', help="건물 (예: 1공, 제1공학관)")
+    parser.add_argument('room', nargs='?', help="강의실 (예: 704)")
+    parser.add_argument('--date', help="YYYY-MM-DD")
+    parser.add_argument('--start', help="HH:MM")
+    parser.add_argument('--end', help="HH:MM")
+    parser.add_argument('--queries', help="JSON lines 질의 파일 ('-'면 표준 입력)")
+    add_source_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.queries:
+            queries = read_queries(args.queries)
+        elif args.building and args.room and args.date and args.start and args.end:
+            queries = [parse_query(vars(args))]
+        else:
+            parser.error("building room --date --start --end 또는 --queries가 필요합니다")
+        loader = loader_from_args(args)
+        # kutis/engine/미러 코드의 [LOG] 출력이 JSON 앞에 섞이지 않도록 표준 오류로 돌림
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run(queries, loader)
+    except (OSError, ValueError, KeyError) as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        return 2
+    output = results if args.queries else results[0]
+    print(json.dumps(to_json(output), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""예약/강의 SQLite 저장소
+
+웹 예약과 수동 입력은 날짜 구간으로, 강의는 요일 시간표로 저장한다.
+겹침 조회는 (building_id, room_id, start_at, end_at) 인덱스를 타며, 웹 예약은
+KUTIS에서 사라져도 지우지 않으므로 이력이 쌓인다.
+
+    db = ReservationDB('reservations.db')
+    db.upsert_reservations(entries)
+    db.overlapping('1공', '704', start, end)
+"""
+import json
+import time
+import sqlite3
+from datetime import datetime, timedelta
+from mirror_store import entry_to_json, entry_from_json
+from room_index import canonical_building, room_keys, room_numbers
+from recurrence import WeeklyLectures
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buildings (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    code TEXT
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY,
+    building_id INTEGER NOT NULL REFERENCES buildings(id),
+    number TEXT NOT NULL,
+    UNIQUE (building_id, number)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    building_id INTEGER NOT NULL REFERENCES buildings(id),
+    room_id INTEGER NOT NULL REFERENCES rooms(id),
+    start_at TEXT NOT NULL,
+    end_at TEXT NOT NULL,
+    person TEXT NOT NULL DEFAULT '',
+    status TEXT,
+    entry TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    UNIQUE (source, building_id, room_id, start_at, end_at, person)
+);
+CREATE INDEX IF NOT EXISTS reservations_interval ON reservations (building_id, room_id, start_at, end_at);
+CREATE INDEX IF NOT EXISTS reservations_start ON reservations (start_at);
+CREATE TABLE IF NOT EXISTS lectures (
+    id INTEGER PRIMARY KEY,
+    building_id INTEGER NOT NULL REFERENCES buildings(id),
+    room_id INTEGER NOT NULL REFERENCES rooms(id),
+    weekday INTEGER NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    UNIQUE (building_id, room_id, weekday, start_minute, end_minute, name)
+);
+CREATE INDEX IF NOT EXISTS lectures_interval ON lectures (building_id, room_id, weekday, start_minute, end_minute);
+CREATE TABLE IF NOT EXISTS room_labels (
+    room_id INTEGER NOT NULL REFERENCES rooms(id),
+    label TEXT NOT NULL,
+    UNIQUE (room_id, label)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def to_db_time(dt):
+    return dt.isoformat(timespec='seconds')
+
+
+# SQLite 저장소
+class ReservationDB:
+    """건물/강의실 id 테이블 + 예약 구간 + 요일별 강의
+
+    연결은 만든 스레드에서만 쓴다 (GUI는 Tk 스레드, 데몬은 메인 스레드).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._buildings = dict(self.conn.execute("SELECT name, id FROM buildings"))
+        self._rooms = {(b, n): i for i, b, n in self.conn.execute("SELECT id, building_id, number FROM rooms")}
+
+    def close(self):
+        self.conn.close()
+
+    # ---- id ----
+    def building_id(self, name, create=True):
+        name = canonical_building(name)
+        if name not in self._buildings and create:
+            cur = self.conn.execute("INSERT INTO buildings (name) VALUES (?)", (name,))
+            self._buildings[name] = cur.lastrowid
+        return self._buildings.get(name)
+
+    def room_id(self, building_id, number, create=True):
+        key = (building_id, number)
+        if key not in self._rooms and create:
+            cur = self.conn.execute("INSERT INTO rooms (building_id, number) VALUES (?, ?)", key)
+            self._rooms[key] = cur.lastrowid
+        return self._rooms.get(key)
+
+    def _room_rows(self, entry):
+        """항목이 속한 (building_id, room_id) 목록 (없으면 생성)"""
+        rows = []
+        for building, room in room_keys(entry):
+            building_id = self.building_id(building)
+            rows.append((building_id, self.room_id(building_id, room)))
+        return rows
+
+    def upsert_buildings(self, buildings):
+        """KUTIS 건물 목록 [(코드, 이름)] 반영"""
+        with self.conn:
+            for code, name in buildings:
+                building_id = self.building_id(name)
+                self.conn.execute("UPDATE buildings SET code = ? WHERE id = ?", (code, building_id))
+
+    # ---- 예약 ----
+    def upsert_reservations(self, entries, now=None):
+        """조회 결과를 한 트랜잭션으로 반영. 이미 있으면 상태/마지막 확인 시각만 갱신"""
+        now = now or time.time()
+        rows = []
+        for entry in entries:
+            data = json.dumps(entry_to_json({k: v for k, v in entry.items() if k != 'conflict'}),
+                              ensure_ascii=False)
+            for building_id, room_id in self._room_rows(entry):
+                rows.append((entry['source'], building_id, room_id, to_db_time(entry['start']),
+                             to_db_time(entry['end']), entry.get('person') or '', entry.get('status'),
+                             data, now, now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO reservations (source, building_id, room_id, start_at, end_at, person, status,"
+                " entry, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (source, building_id, room_id, start_at, end_at, person) DO UPDATE SET"
+                " status = excluded.status, entry = excluded.entry, last_seen = excluded.last_seen",
+                rows
+            )
+        return len(rows)
+
+    def touch_reservations(self, entries, now=None):
+        """다시 조회된 항목의 마지막 확인 시각만 갱신 (없는 항목은 무시)"""
+        now = now or time.time()
+        rows = [(now, entry['source'], building_id, room_id, to_db_time(entry['start']),
+                 to_db_time(entry['end']), entry.get('person') or '')
+                for entry in entries for building_id, room_id in self._room_rows(entry)]
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE reservations SET last_seen = ? WHERE source = ? AND building_id = ? AND room_id = ?"
+                " AND start_at = ? AND end_at = ? AND person = ?",
+                rows
+            )
+
+    def delete_reservations(self, entries):
+        rows = [(entry['source'], building_id, room_id, to_db_time(entry['start']),
+                 to_db_time(entry['end']), entry.get('person') or '')
+                for entry in entries for building_id, room_id in self._room_rows(entry)]
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM reservations WHERE source = ? AND building_id = ? AND room_id = ?"
+                " AND start_at = ? AND end_at = ? AND person = ?",
+                rows
+            )
+
+    def reservations(self, first_day=None, last_day=None, sources=None, building=None):
+        """조건에 맞는 예약 항목 (여러 강의실에 걸친 항목은 한 번만)"""
+        clauses, params = [], []
+        if first_day is not None:
+            clauses.append("end_at > ?")
+            params.append(to_db_time(datetime.combine(first_day, datetime.min.time())))
+        if last_day is not None:
+            clauses.append("start_at < ?")
+            params.append(to_db_time(datetime.combine(last_day + timedelta(days=1), datetime.min.time())))
+        if sources:
+            clauses.append(f"source IN ({', '.join('?' * len(sources))})")
+            params.extend(sources)
+        if building is not None:
+            clauses.append("building_id = ?")
+            params.append(self.building_id(building, create=False))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT entry, MIN(start_at) FROM reservations{where} GROUP BY entry ORDER BY 2", params)
+        return [entry_from_json(json.loads(entry)) for entry, _ in rows]
+
+    def manual_entries(self):
+        return self.reservations(sources=['수동입력'])
+
+    # ---- 강의 ----
+    def replace_lectures(self, weekly_lectures, room_labels=None, fetched_at=None):
+        """요일별 강의 시간표(recurrence.WeeklyLectures)와 강의실 별칭으로 강의 테이블 교체
+
+        room_labels는 parse_lectures_xml의 (공식 건물명, 호수) → XML 강의실 이름 집합,
+        fetched_at은 XML을 받은 시각(없으면 지금)이다.
+        """
+        rows = []
+        for (building, room), weekday, start, end, name in weekly_lectures.items():
+            building_id = self.building_id(building)
+            rows.append((building_id, self.room_id(building_id, room), weekday, start, end, name))
+        label_rows = []
+        for (building, room), labels in (room_labels or {}).items():
+            building_id = self.building_id(building)
+            room_id = self.room_id(building_id, room)
+            label_rows.extend((room_id, label) for label in labels)
+        with self.conn:
+            self.conn.execute("DELETE FROM lectures")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO lectures (building_id, room_id, weekday, start_minute, end_minute, name)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute("DELETE FROM room_labels")
+            self.conn.executemany("INSERT OR IGNORE INTO room_labels (room_id, label) VALUES (?, ?)", label_rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lectures_fetched_at', ?)",
+                              (str(fetched_at or time.time()),))
+        return len(rows)
+
+    def lectures_fetched_at(self):
+        """강의 테이블을 채운 XML을 받은 시각 (저장된 적이 없으면 None)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'lectures_fetched_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def room_labels(self):
+        """(공식 건물명, 호수) → XML 강의실 이름 집합 (engine.room_labels 형식)"""
+        labels = {}
+        rows = self.conn.execute(
+            "SELECT b.name, r.number, l.label FROM room_labels l"
+            " JOIN rooms r ON r.id = l.room_id JOIN buildings b ON b.id = r.building_id")
+        for building, number, label in rows:
+            labels.setdefault((building, number), set()).add(label)
+        return labels
+
+    def weekly_lectures(self):
+        """강의 테이블 → 요일별 강의 시간표 (비어 있으면 빈 WeeklyLectures)"""
+        rows = self.conn.execute(
+            "SELECT b.name, r.number, l.weekday, l.start_minute, l.end_minute, l.name FROM lectures l"
+            " JOIN buildings b ON b.id = l.building_id JOIN rooms r ON r.id = l.room_id")
+        return WeeklyLectures.from_items(((building, number), weekday, start, end, name)
+                                         for building, number, weekday, start, end, name in rows)
+
+    # ---- 겹침 조회 ----
+    def overlapping(self, building, room, start, end, sources=None):
+        """[start, end)와 겹치는 예약 + 강의 (강의는 날짜를 붙인 항목으로)"""
+        building_id = self.building_id(building, create=False)
+        if building_id is None:
+            return []
+        found = []
+        for number in room_numbers(room, canonical_building(building)):
+            room_id = self.room_id(building_id, number, create=False)
+            if room_id is None:
+                continue
+            rows = self.conn.execute(
+                "SELECT entry FROM reservations WHERE building_id = ? AND room_id = ?"
+                " AND start_at < ? AND end_at > ? ORDER BY start_at",
+                (building_id, room_id, to_db_time(end), to_db_time(start)))
+            found.extend(entry_from_json(json.loads(entry)) for entry, in rows)
+            day = start.date()
+            while day <= (end - timedelta(microseconds=1)).date():
+                base = datetime.combine(day, datetime.min.time())
+                lo = max(0, int((start - base).total_seconds() // 60))
+                hi = min(24 * 60, -int(-(end - base).total_seconds() // 60))
+                rows = self.conn.execute(
+                    "SELECT start_minute, end_minute, name FROM lectures WHERE building_id = ? AND room_id = ?"
+                    " AND weekday = ? AND start_minute < ? AND end_minute > ? ORDER BY start_minute",
+                    (building_id, room_id, day.weekday(), hi, lo))
+                found.extend({'source': '수업', 'building': canonical_building(building), 'room': number,
+                              'name': name, 'start': base + timedelta(minutes=s), 'end': base + timedelta(minutes=e)}
+                             for s, e, name in rows)
+                day += timedelta(days=1)
+        if sources:
+            found = [entry for entry in found if entry['source'] in sources]
+        return sorted(found, key=lambda entry: entry['start'])